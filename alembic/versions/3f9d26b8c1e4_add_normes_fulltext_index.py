@@ -0,0 +1,31 @@
+"""Add normes fulltext index
+
+Revision ID: 3f9d26b8c1e4
+Revises: 7c41e9a0d2b3
+Create Date: 2026-10-18 10:02:17.506391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9d26b8c1e4'
+down_revision: Union[str, Sequence[str], None] = '7c41e9a0d2b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FULLTEXT n'existe que sous MySQL ; ailleurs l'API utilise l'index en mémoire
+    if op.get_bind().dialect.name == "mysql":
+        op.create_index('ix_normes_fulltext_nom_codification', 'normes', ['nom', 'codification'], unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "mysql":
+        op.drop_index('ix_normes_fulltext_nom_codification', table_name='normes')
@@ -0,0 +1,37 @@
+"""Seed cache_versions for admins, clients and users
+
+Revision ID: 4e7a19c2b5d0
+Revises: c83a5f0e19d4
+Create Date: 2026-10-18 18:02:44.517320
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e7a19c2b5d0'
+down_revision: Union[str, Sequence[str], None] = 'c83a5f0e19d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    cache_versions = sa.table(
+        'cache_versions',
+        sa.column('nom', sa.String(length=50)),
+        sa.column('version', sa.BigInteger()),
+    )
+    op.bulk_insert(cache_versions, [
+        {'nom': 'admins', 'version': 0},
+        {'nom': 'clients', 'version': 0},
+        {'nom': 'users', 'version': 0},
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM cache_versions WHERE nom IN ('admins', 'clients', 'users')")
@@ -0,0 +1,43 @@
+"""Add normes.fichier_modifie_le
+
+Revision ID: 5b8f1d3e6a27
+Revises: e2b7a4c90f18
+Create Date: 2026-10-18 14:58:32.614470
+
+"""
+import os
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8f1d3e6a27'
+down_revision: Union[str, Sequence[str], None] = 'e2b7a4c90f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('normes', sa.Column('fichier_modifie_le', sa.DateTime(), nullable=True))
+
+    # Reprendre la date de modification des fichiers déjà déposés
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, fichier_pdf FROM normes")).fetchall()
+    for norme_id, fichier_pdf in rows:
+        try:
+            mtime = os.stat(fichier_pdf).st_mtime
+        except OSError:
+            continue
+        bind.execute(
+            sa.text("UPDATE normes SET fichier_modifie_le = :date WHERE id = :id"),
+            {"date": datetime.utcfromtimestamp(mtime), "id": norme_id},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('normes', 'fichier_modifie_le')
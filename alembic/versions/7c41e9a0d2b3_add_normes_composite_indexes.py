@@ -0,0 +1,30 @@
+"""Add normes composite indexes
+
+Revision ID: 7c41e9a0d2b3
+Revises: b14d3e22e5df
+Create Date: 2026-10-18 09:12:44.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c41e9a0d2b3'
+down_revision: Union[str, Sequence[str], None] = 'b14d3e22e5df'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_normes_secteur_id_date_creation', 'normes', ['secteur_id', 'date_creation'], unique=False)
+    op.create_index('ix_normes_date_creation_id', 'normes', ['date_creation', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_normes_date_creation_id', table_name='normes')
+    op.drop_index('ix_normes_secteur_id_date_creation', table_name='normes')
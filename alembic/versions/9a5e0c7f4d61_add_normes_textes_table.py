@@ -0,0 +1,37 @@
+"""Add normes_textes table
+
+Revision ID: 9a5e0c7f4d61
+Revises: 3f9d26b8c1e4
+Create Date: 2026-10-18 11:26:51.872034
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '9a5e0c7f4d61'
+down_revision: Union[str, Sequence[str], None] = '3f9d26b8c1e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('normes_textes',
+    sa.Column('norme_id', sa.Integer(), nullable=False),
+    sa.Column('contenu', sa.Text().with_variant(mysql.LONGTEXT(), 'mysql'), nullable=False),
+    sa.ForeignKeyConstraint(['norme_id'], ['normes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('norme_id')
+    )
+    if op.get_bind().dialect.name == "mysql":
+        op.create_index('ix_normes_textes_fulltext_contenu', 'normes_textes', ['contenu'], unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "mysql":
+        op.drop_index('ix_normes_textes_fulltext_contenu', table_name='normes_textes')
+    op.drop_table('normes_textes')
@@ -0,0 +1,37 @@
+"""Add cache_versions
+
+Revision ID: c83a5f0e19d4
+Revises: 5b8f1d3e6a27
+Create Date: 2026-10-18 16:21:07.283914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c83a5f0e19d4'
+down_revision: Union[str, Sequence[str], None] = '5b8f1d3e6a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    cache_versions = op.create_table(
+        'cache_versions',
+        sa.Column('nom', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('nom')
+    )
+    op.bulk_insert(cache_versions, [
+        {'nom': 'secteurs', 'version': 0},
+        {'nom': 'normes', 'version': 0},
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cache_versions')
@@ -0,0 +1,52 @@
+"""Add catalogue_changes and modifie_le on normes / secteurs
+
+Revision ID: d5a2f8e61c07
+Revises: 4e7a19c2b5d0
+Create Date: 2026-10-18 19:14:52.308716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a2f8e61c07'
+down_revision: Union[str, Sequence[str], None] = '4e7a19c2b5d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('normes', sa.Column('modifie_le', sa.DateTime(), server_default=sa.func.now(), nullable=False))
+    op.add_column('secteurs', sa.Column('modifie_le', sa.DateTime(), server_default=sa.func.now(), nullable=False))
+
+    op.create_table(
+        'catalogue_changes',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+        sa.Column('entite', sa.String(length=20), nullable=False),
+        sa.Column('objet_id', sa.Integer(), nullable=False),
+        sa.Column('operation', sa.String(length=10), nullable=False),
+        sa.Column('modifie_le', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # Le catalogue existant ouvre le journal : un miroir qui part de zéro le
+    # reçoit en entier, secteurs d'abord
+    op.execute(
+        "INSERT INTO catalogue_changes (entite, objet_id, operation, modifie_le) "
+        "SELECT 'secteurs', id, 'insert', modifie_le FROM secteurs ORDER BY id"
+    )
+    op.execute(
+        "INSERT INTO catalogue_changes (entite, objet_id, operation, modifie_le) "
+        "SELECT 'normes', id, 'insert', modifie_le FROM normes ORDER BY id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('catalogue_changes')
+    op.drop_column('secteurs', 'modifie_le')
+    op.drop_column('normes', 'modifie_le')
@@ -0,0 +1,85 @@
+"""Content-addressed PDF storage
+
+Revision ID: e2b7a4c90f18
+Revises: 9a5e0c7f4d61
+Create Date: 2026-10-18 13:41:05.220917
+
+"""
+import hashlib
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7a4c90f18'
+down_revision: Union[str, Sequence[str], None] = '9a5e0c7f4d61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copie figée de la disposition de app/utils/storage.py
+UPLOAD_DIR = Path("uploads/pdf")
+CHUNK_SIZE = 1024 * 1024
+
+
+def _blob_path(sha256: str) -> Path:
+    return UPLOAD_DIR / sha256[:2] / sha256[2:4] / f"{sha256}.pdf"
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('normes', sa.Column('fichier_sha256', sa.String(length=64), nullable=True))
+    op.add_column('normes', sa.Column('fichier_taille', sa.BigInteger(), nullable=True))
+    op.create_index(op.f('ix_normes_fichier_sha256'), 'normes', ['fichier_sha256'], unique=False)
+
+    # Déplacer les fichiers existants (uploads/pdf/<nom>.pdf) vers leur adresse
+    # par contenu. Plusieurs lignes pouvaient pointer vers le même nom de
+    # fichier : chaque ancien chemin n'est traité qu'une fois.
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, fichier_pdf FROM normes")).fetchall()
+    rehomed = {}
+    for norme_id, fichier_pdf in rows:
+        if fichier_pdf not in rehomed:
+            source = Path(fichier_pdf)
+            if not source.is_file():
+                # Fichier manquant : la ligne garde son chemin, sans hash
+                rehomed[fichier_pdf] = None
+                continue
+            sha256 = _hash_file(source)
+            taille = source.stat().st_size
+            destination = _blob_path(sha256)
+            if destination.exists():
+                if source.resolve() != destination.resolve():
+                    source.unlink()
+            else:
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                source.replace(destination)
+            rehomed[fichier_pdf] = (str(destination), sha256, taille)
+        if rehomed[fichier_pdf] is None:
+            continue
+        path, sha256, taille = rehomed[fichier_pdf]
+        bind.execute(
+            sa.text(
+                "UPDATE normes SET fichier_pdf = :path, fichier_sha256 = :sha256, "
+                "fichier_taille = :taille WHERE id = :id"
+            ),
+            {"path": path, "sha256": sha256, "taille": taille, "id": norme_id},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Les fichiers restent à leur adresse par contenu : fichier_pdf y pointe toujours
+    op.drop_index(op.f('ix_normes_fichier_sha256'), table_name='normes')
+    op.drop_column('normes', 'fichier_taille')
+    op.drop_column('normes', 'fichier_sha256')
@@ -0,0 +1,40 @@
+"""Add secteurs_stats
+
+Revision ID: f1c6b0d93a48
+Revises: d5a2f8e61c07
+Create Date: 2026-10-18 20:37:19.845102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6b0d93a48'
+down_revision: Union[str, Sequence[str], None] = 'd5a2f8e61c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'secteurs_stats',
+        sa.Column('secteur_id', sa.Integer(), nullable=False),
+        sa.Column('nb_normes', sa.Integer(), nullable=False),
+        sa.Column('derniere_date_creation', sa.Date(), nullable=True),
+        sa.ForeignKeyConstraint(['secteur_id'], ['secteurs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('secteur_id')
+    )
+    op.execute(
+        "INSERT INTO secteurs_stats (secteur_id, nb_normes, derniere_date_creation) "
+        "SELECT secteurs.id, COUNT(normes.id), MAX(normes.date_creation) "
+        "FROM secteurs LEFT JOIN normes ON normes.secteur_id = secteurs.id GROUP BY secteurs.id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('secteurs_stats')
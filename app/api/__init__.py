@@ -3,4 +3,5 @@ from .admin_api import router as admins_router
 from .client_api import router as clients_router
 from .norme_api import router as normes_router
 from .secteur_api import router as secteurs_router
-from .login_api import router as login_router
\ No newline at end of file
+from .login_api import router as login_router
+from .internal_api import router as internal_router
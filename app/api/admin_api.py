@@ -1,109 +1,147 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
 from app.models.admin import Admin
-from app.schemas.admin import AdminCreate
-from app.config.database import SessionLocal
-from app.utils.response import success_response, error_response
-from passlib.context import CryptContext
+from app.schemas.admin import AdminCreate, AdminData
+from app.config.database import get_db
+from app.utils.response import success_response, error_response, paginated_response
+from app.utils.pagination import paginate, CurseurInvalide, DEFAULT_LIMIT, MAX_LIMIT
+from app.utils.passwords import password_hasher, HachageSature
+from app.utils.cache import bump_version, invalidate
+from app.utils.http_cache import check_versions, with_etag
 from sqlalchemy.exc import IntegrityError
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 router = APIRouter(prefix="/admins", tags=["Admins"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.post("/")
-def create_admin(admin: AdminCreate, db: Session = Depends(get_db)):
+async def create_admin(admin: AdminCreate, db=Depends(get_db)):
     # Vérifier que les champs ne sont pas vides
     if not admin.username or not admin.email or not admin.password:
         return error_response(message="Tous les champs sont obligatoires", status_code=400)
 
+    try:
+        hashed_password = await password_hasher.hash(admin.password)
+    except HachageSature:
+        return error_response(message="Service surchargé, veuillez réessayer", status_code=503)
+
     db_admin = Admin(username=admin.username, email=admin.email)
-    db_admin.hashed_password = pwd_context.hash(admin.password)
+    db_admin.hashed_password = hashed_password
 
     try:
         db.add(db_admin)
-        db.commit()
-        db.refresh(db_admin)
+        await bump_version(db, "admins")
+        await db.commit()
+        invalidate("admins")
+        await db.refresh(db_admin)
         return success_response(
             data={"id": db_admin.id, "username": db_admin.username, "email": db_admin.email},
-            message="Admin créé avec succès"
+            message="Admin créé avec succès",
+            schema=AdminData
         )
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         return error_response(message="Username ou email déjà existant", status_code=400)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return error_response(message=f"Erreur serveur: {e}", status_code=500)
 
 @router.get("/{admin_id}")
-def read_admin(admin_id: int, db: Session = Depends(get_db)):
-    db_admin = db.query(Admin).filter(Admin.id == admin_id).first()
+async def read_admin(admin_id: int, request: Request, db=Depends(get_db)):
+    etag, not_modified = await check_versions(request, db, "admins")
+    if not_modified:
+        return not_modified
+    db_admin = await db.get(Admin, admin_id)
     if not db_admin:
         return error_response(message="Admin non trouvé", status_code=404)
-    return success_response(
-        data={"id": db_admin.id, "username": db_admin.username, "email": db_admin.email}
-    )
+    return with_etag(success_response(
+        data={"id": db_admin.id, "username": db_admin.username, "email": db_admin.email},
+        schema=AdminData
+    ), etag)
 
 
 @router.get("/")
-def read_admins(db: Session = Depends(get_db)):
-    admins = db.query(Admin).all()
+async def read_admins(
+    request: Request,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: Optional[str] = None,
+    db=Depends(get_db)
+):
+    etag, not_modified = await check_versions(request, db, "admins")
+    if not_modified:
+        return not_modified
+    try:
+        admins, next_cursor = await paginate(db, select(Admin), Admin.id, limit, after)
+    except CurseurInvalide:
+        return error_response(message="Curseur de pagination invalide", status_code=400)
     data = [{"id": a.id, "username": a.username, "email": a.email} for a in admins]
-    return success_response(data=data)
+    return with_etag(paginated_response(data=data, next_cursor=next_cursor, schema=AdminData), etag)
 
 
 @router.delete("/{admin_id}")
-def delete_admin(admin_id: int, db: Session = Depends(get_db)):
-    db_admin = db.query(Admin).filter(Admin.id == admin_id).first()
+async def delete_admin(admin_id: int, db=Depends(get_db)):
+    db_admin = await db.get(Admin, admin_id)
     if not db_admin:
         return error_response(message="Admin non trouvé", status_code=404)
-    db.delete(db_admin)
-    db.commit()
+    await db.delete(db_admin)
+    await bump_version(db, "admins")
+    await db.commit()
+    invalidate("admins")
     return success_response(
         data={"id": db_admin.id, "username": db_admin.username, "email": db_admin.email},
-        message="Admin supprimé avec succès"
+        message="Admin supprimé avec succès",
+        schema=AdminData
     )
 
 
 @router.put("/{admin_id}")
-def update_admin(admin_id: int, admin: AdminCreate, db: Session = Depends(get_db)):
-    db_admin = db.query(Admin).filter(Admin.id == admin_id).first()
+async def update_admin(admin_id: int, admin: AdminCreate, db=Depends(get_db)):
+    db_admin = await db.get(Admin, admin_id)
     if not db_admin:
         return error_response(message="Admin non trouvé", status_code=404)
 
     # Vérifier que le username n'est pas déjà utilisé par un autre admin
     if admin.username:
-        existing_username = db.query(Admin).filter(Admin.username == admin.username, Admin.id != admin_id).first()
-        if existing_username:
+        existing_username = await db.scalar(
+            select(Admin.id).where(Admin.username == admin.username, Admin.id != admin_id).limit(1)
+        )
+        if existing_username is not None:
             return error_response(message="Username déjà utilisé", status_code=400)
-        db_admin.username = admin.username
 
     # Vérifier que l'email n'est pas déjà utilisé par un autre admin
     if admin.email:
-        existing_email = db.query(Admin).filter(Admin.email == admin.email, Admin.id != admin_id).first()
-        if existing_email:
+        existing_email = await db.scalar(
+            select(Admin.id).where(Admin.email == admin.email, Admin.id != admin_id).limit(1)
+        )
+        if existing_email is not None:
             return error_response(message="Email déjà utilisé", status_code=400)
-        db_admin.email = admin.email
 
-    # Mettre à jour le mot de passe si fourni
+    # Nouveau mot de passe si fourni (bcrypt dans le pool de processus)
+    hashed_password = None
     if admin.password:
-        db_admin.hashed_password = pwd_context.hash(admin.password)
+        try:
+            hashed_password = await password_hasher.hash(admin.password)
+        except HachageSature:
+            return error_response(message="Service surchargé, veuillez réessayer", status_code=503)
+
+    # Modifications appliquées une fois tout vérifié : un retour en erreur ne
+    # laisse rien à valider en fin de requête
+    if admin.username:
+        db_admin.username = admin.username
+    if admin.email:
+        db_admin.email = admin.email
+    if hashed_password:
+        db_admin.hashed_password = hashed_password
 
     try:
-        db.commit()
-        db.refresh(db_admin)
+        await bump_version(db, "admins")
+        await db.commit()
+        invalidate("admins")
+        await db.refresh(db_admin)
         return success_response(
             data={"id": db_admin.id, "username": db_admin.username, "email": db_admin.email},
-            message="Admin mis à jour avec succès"
+            message="Admin mis à jour avec succès",
+            schema=AdminData
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return error_response(message=f"Erreur serveur: {e}", status_code=500)
@@ -1,95 +1,127 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
 from app.models.client import Client
-from app.schemas.client import ClientCreate
-from app.config.database import SessionLocal
-from app.utils.response import success_response, error_response
-from passlib.context import CryptContext
+from app.schemas.client import ClientCreate, ClientData
+from app.config.database import get_db
+from app.utils.response import success_response, error_response, paginated_response
+from app.utils.pagination import paginate, CurseurInvalide, DEFAULT_LIMIT, MAX_LIMIT
+from app.utils.passwords import password_hasher, HachageSature
+from app.utils.cache import bump_version, invalidate
+from app.utils.http_cache import check_versions, with_etag
 from sqlalchemy.exc import IntegrityError
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
-def get_db():
-    db = SessionLocal()
+@router.post("/")
+async def create_client(client: ClientCreate, db=Depends(get_db)):
     try:
-        yield db
-    finally:
-        db.close()
-
+        hashed_password = await password_hasher.hash(client.password)
+    except HachageSature:
+        return error_response(message="Service surchargé, veuillez réessayer", status_code=503)
 
-@router.post("/")
-def create_client(client: ClientCreate, db: Session = Depends(get_db)):
     db_client = Client(username=client.username, email=client.email)
-    db_client.hashed_password = pwd_context.hash(client.password)
+    db_client.hashed_password = hashed_password
     try:
         db.add(db_client)
-        db.commit()
-        db.refresh(db_client)
+        await bump_version(db, "clients")
+        await db.commit()
+        invalidate("clients")
+        await db.refresh(db_client)
         return success_response(
             data={"id": db_client.id, "username": db_client.username, "email": db_client.email},
-            message="Client créé avec succès"
+            message="Client créé avec succès",
+            schema=ClientData
         )
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         return error_response(message="Username ou email déjà existant", status_code=400)
 
 
 @router.get("/{client_id}")
-def read_client(client_id: int, db: Session = Depends(get_db)):
-    db_client = db.query(Client).filter(Client.id == client_id).first()
+async def read_client(client_id: int, request: Request, db=Depends(get_db)):
+    etag, not_modified = await check_versions(request, db, "clients")
+    if not_modified:
+        return not_modified
+    db_client = await db.get(Client, client_id)
     if not db_client:
         return error_response(message="Client non trouvé", status_code=404)
-    return success_response(
-        data={"id": db_client.id, "username": db_client.username, "email": db_client.email}
-    )
+    return with_etag(success_response(
+        data={"id": db_client.id, "username": db_client.username, "email": db_client.email},
+        schema=ClientData
+    ), etag)
 
 
 @router.get("/")
-def read_clients(db: Session = Depends(get_db)):
-    clients = db.query(Client).all()
+async def read_clients(
+    request: Request,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: Optional[str] = None,
+    db=Depends(get_db)
+):
+    etag, not_modified = await check_versions(request, db, "clients")
+    if not_modified:
+        return not_modified
+    try:
+        clients, next_cursor = await paginate(db, select(Client), Client.id, limit, after)
+    except CurseurInvalide:
+        return error_response(message="Curseur de pagination invalide", status_code=400)
     data = [{"id": c.id, "username": c.username, "email": c.email} for c in clients]
-    return success_response(data=data)
+    return with_etag(paginated_response(data=data, next_cursor=next_cursor, schema=ClientData), etag)
 
 
 @router.delete("/{client_id}")
-def delete_client(client_id: int, db: Session = Depends(get_db)):
-    db_client = db.query(Client).filter(Client.id == client_id).first()
+async def delete_client(client_id: int, db=Depends(get_db)):
+    db_client = await db.get(Client, client_id)
     if not db_client:
         return error_response(message="Client non trouvé", status_code=404)
-    db.delete(db_client)
-    db.commit()
+    await db.delete(db_client)
+    await bump_version(db, "clients")
+    await db.commit()
+    invalidate("clients")
     return success_response(
         data={"id": db_client.id, "username": db_client.username, "email": db_client.email},
-        message="Client supprimé avec succès"
+        message="Client supprimé avec succès",
+        schema=ClientData
     )
 
 
 
 @router.put("/{client_id}")
-def update_client(client_id: int, client: ClientCreate, db: Session = Depends(get_db)):
-    db_client = db.query(Client).filter(Client.id == client_id).first()
+async def update_client(client_id: int, client: ClientCreate, db=Depends(get_db)):
+    db_client = await db.get(Client, client_id)
     if not db_client:
         return error_response(message="Client non trouvé", status_code=404)
 
     # Vérifier si le username existe pour un autre client
-    existing_username = db.query(Client).filter(Client.username == client.username, Client.id != client_id).first()
-    if existing_username:
+    existing_username = await db.scalar(
+        select(Client.id).where(Client.username == client.username, Client.id != client_id).limit(1)
+    )
+    if existing_username is not None:
         return error_response(message="Username déjà utilisé", status_code=400)
 
     # Vérifier si l'email existe pour un autre client
-    existing_email = db.query(Client).filter(Client.email == client.email, Client.id != client_id).first()
-    if existing_email:
+    existing_email = await db.scalar(
+        select(Client.id).where(Client.email == client.email, Client.id != client_id).limit(1)
+    )
+    if existing_email is not None:
         return error_response(message="Email déjà utilisé", status_code=400)
 
+    # bcrypt dans le pool de processus dédié
+    try:
+        hashed_password = await password_hasher.hash(client.password)
+    except HachageSature:
+        return error_response(message="Service surchargé, veuillez réessayer", status_code=503)
+
     # Mise à jour
     db_client.username = client.username
     db_client.email = client.email
-    db_client.hashed_password = pwd_context.hash(client.password)
+    db_client.hashed_password = hashed_password
 
-    db.commit()
-    db.refresh(db_client)
+    await bump_version(db, "clients")
+    await db.commit()
+    invalidate("clients")
+    await db.refresh(db_client)
 
     return success_response(
         data={
@@ -97,5 +129,6 @@ def update_client(client_id: int, client: ClientCreate, db: Session = Depends(ge
             "username": db_client.username,
             "email": db_client.email
         },
-        message="Client mis à jour avec succès"
+        message="Client mis à jour avec succès",
+        schema=ClientData
     )
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from app.config.database import pool_metrics, async_pool_metrics
+from app.utils.db_metrics import request_db_metrics
+from app.utils.cache import secteurs_cache, normes_cache
+from app.utils.singleflight import flights
+from app.utils.passwords import password_hasher
+from app.utils.response import success_response
+
+# Métriques internes (protégées par le jeton comme le reste de l'API)
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+
+@router.get("/metrics")
+def read_metrics():
+    db_pool = {"sync": pool_metrics.stats()}
+    if async_pool_metrics is not None:
+        db_pool["async"] = async_pool_metrics.stats()
+    return success_response(data={
+        "password_hashing": password_hasher.stats(),
+        "db_pool": db_pool,
+        "db_requests": request_db_metrics.stats(),
+        "cache": {
+            "secteurs": secteurs_cache.stats(),
+            "normes": normes_cache.stats()
+        },
+        "coalescing": flights.stats()
+    })
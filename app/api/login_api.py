@@ -1,30 +1,37 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from pydantic import BaseModel
 from app.models.admin import Admin
-from app.config import database
-from app.utils.auth import verify_password, create_access_token
+from app.config.database import get_db
+from app.utils.auth import create_access_token
+from app.utils.passwords import password_hasher, HachageSature
 from app.utils.response import success_response, error_response
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # ✅ Schema pour login via JSON
 class LoginRequest(BaseModel):
     username: str
     password: str
 
 @router.post("/login")
-def login(request: LoginRequest, db: Session = Depends(get_db)):
-    admin = db.query(Admin).filter(Admin.username == request.username).first()
-    if not admin or not verify_password(request.password, admin.hashed_password):
+async def login(request: LoginRequest, db=Depends(get_db)):
+    admin = await db.scalar(select(Admin).where(Admin.username == request.username).limit(1))
+    if not admin or not admin.hashed_password:
+        return error_response(message="Nom d'utilisateur ou mot de passe incorrect", status_code=401)
+
+    # bcrypt dans le pool de processus dédié
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(request.password, admin.hashed_password)
+    except HachageSature:
+        return error_response(message="Service surchargé, veuillez réessayer", status_code=503)
+    if not valid:
         return error_response(message="Nom d'utilisateur ou mot de passe incorrect", status_code=401)
 
+    # Coût bcrypt modifié depuis le dernier calcul : on en profite pour re-hacher
+    # (pas de bump_version : le hash n'apparaît dans aucune réponse en cache)
+    if new_hash:
+        admin.hashed_password = new_hash
+
     access_token = create_access_token(data={"sub": admin.username})
     return success_response(data={"access_token": access_token, "token_type": "bearer"})
@@ -1,139 +1,693 @@
-from fastapi import APIRouter, Depends, UploadFile, File ,Form
-from sqlalchemy.orm import Session 
-from sqlalchemy.exc import IntegrityError
-from pathlib import Path
-from shutil import copyfileobj
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile, File ,Form, Query, Request
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+from sqlalchemy import select, update, delete, func, extract
+from sqlalchemy.exc import IntegrityError, DBAPIError
+from pydantic import TypeAdapter
+from sqlalchemy.dialects.mysql import match
 from datetime import date
 from app.models.norme import Norme
 from app.models.secteur import Secteur
-from app.config.database import SessionLocal
-from app.utils.response import success_response, error_response
+from app.models.norme_texte import NormeTexte
+from app.models.secteur_stats import SecteurStats
+from app.config.database import SessionLocal, AsyncSessionLocal, get_db, run_with_session
+from app.config.settings import settings
+from app.schemas.norme import NormeData, NormeSearchData, NormeImportData, NormeBatchGet, NormeBatchData, NormeBulkUpdate, NormeBulkDelete, NormeBulkData, NormeFacetsData
+from app.schemas.catalogue import CatalogueChangesData
+from app.utils.response import success_response, error_response, paginated_response
+from app.utils.pagination import paginate, CurseurInvalide, DEFAULT_LIMIT, MAX_LIMIT, encode_cursor, decode_cursor
+from app.utils.search import normes_index, contenus_index, norme_search_text, boolean_query, tokenize
+from app.utils.pdf_text import index_norme_pdf, drop_norme_text, drop_normes_text
+from app.utils.storage import blob_path, receive_upload, store_blob, release_blobs, accel_redirect_uri, FichierTropVolumineux
+from app.utils.cache import normes_cache, version_stamps, bump_version, invalidate
+from app.utils.singleflight import flights
+from app.utils.changes import record_change, record_changes, read_journal, collapse_changes
+from app.utils.bulk_import import import_normes, ManifesteInvalide, ArchiveInvalide, MAX_MANIFESTE_SIZE
+from app.utils.zip_stream import normes_zip_response
+from app.utils.secteur_stats import lock_secteur_stats, lock_normes, apply_secteur_stats
+from app.utils.http_cache import http_date, is_not_modified, check_versions, with_etag, RangeFileResponse
 from datetime import datetime, date
-from fastapi.responses  import FileResponse
+from fastapi.responses  import StreamingResponse, Response
+import csv
+import io
+import logging
+import os
 
 router = APIRouter(prefix="/normes", tags=["Normes"])
+logger = logging.getLogger(__name__)
 
-UPLOAD_DIR = Path("uploads/pdf")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Colonnes exposées par l'API : une seule requête jointe, sans instancier Norme/Secteur
+NORME_COLONNES = (
+    Norme.id,
+    Norme.codification,
+    Norme.nom,
+    Norme.date_creation,
+    Norme.fichier_pdf,
+    Secteur.id.label("secteur_id"),
+    Secteur.nom.label("secteur_nom"),
+)
 
-def get_db():
-    db = SessionLocal()
+def normes_select():
+    return select(*NORME_COLONNES).outerjoin(Secteur, Norme.secteur_id == Secteur.id)
+
+def norme_to_dict(row) -> NormeData:
+    # date_creation reste une date : le TypeAdapter la sérialise en ISO 8601
+    return {
+        "id": row.id,
+        "codification": row.codification,
+        "nom": row.nom,
+        "date_creation": row.date_creation,
+        "fichier_pdf": row.fichier_pdf,
+        "secteur": {
+            "id": row.secteur_id,
+            "nom": row.secteur_nom
+        } if row.secteur_id is not None else None
+    }
+
+async def get_norme_data(db, norme_id: int):
+    row = (await db.execute(normes_select().where(Norme.id == norme_id))).first()
+    return norme_to_dict(row) if row else None
+
+async def get_norme_fichier(db, norme_id: int):
+    return (await db.execute(
+        select(Norme.fichier_pdf, Norme.fichier_sha256, Norme.fichier_modifie_le)
+        .where(Norme.id == norme_id)
+    )).first()
+
+# Lectures des routes les plus sollicitées : les requêtes simultanées sur la
+# même norme partagent une seule lecture en base
+def fetch_norme_data(norme_id: int):
+    return flights.do(("GET /normes/{id}", norme_id), lambda: run_with_session(get_norme_data, norme_id))
+
+def fetch_norme_fichier(norme_id: int):
+    return flights.do(("GET /normes/{id}/pdf", norme_id), lambda: run_with_session(get_norme_fichier, norme_id))
+
+def forget_norme_reads(norme_id: int):
+    flights.forget(("GET /normes/{id}", norme_id))
+    flights.forget(("GET /normes/{id}/pdf", norme_id))
+
+async def remove_norme(db, norme_id: int, *columns):
+    """Supprime une norme et ce qui en dépend (texte indexé, journal,
+    secteurs_stats, version), commite et met à jour les index en mémoire.
+
+    Retourne la ligne supprimée (id, secteur_id, date_creation et
+    `columns`), ou None si la norme n'existe pas. Le PDF n'est pas touché.
+    """
+    stats, rows = await lock_normes(db, [norme_id], *columns)
+    row = rows.get(norme_id)
+    if row is None:
+        return None
+    await drop_norme_text(db, norme_id)
+    await db.execute(delete(Norme).where(Norme.id == norme_id))
+    record_change(db, "normes", norme_id, "delete")
+    await apply_secteur_stats(db, stats, removed=[(row.secteur_id, row.date_creation)])
+    await bump_version(db, "normes")
+    await db.commit()
+    invalidate("normes")
+    forget_norme_reads(norme_id)
+    normes_index.remove(norme_id)
+    contenus_index.remove(norme_id)
+    return row
+
+async def compensate_unstored_blob(db, norme_id: int, tmp_path, compensate, message: str):
+    """Le PDF d'une écriture commitée n'a pas pu être rangé : `compensate()`
+    retire la référence vers ce fichier absent. Si elle échoue aussi, le
+    fichier temporaire est gardé et l'incident journalisé pour réparation."""
     try:
-        yield db
-    finally:
-        db.close()
+        await compensate()
+    except Exception:
+        await db.rollback()
+        logger.exception("Norme %s : référence vers un PDF non rangé, fichier temporaire conservé : %s", norme_id, tmp_path)
+        return error_response(message="Le fichier PDF n'a pas pu être enregistré", status_code=500)
+    await run_in_threadpool(tmp_path.unlink, missing_ok=True)
+    return error_response(message=message, status_code=500)
 
+# Les accès disque (copie de l'upload, rangement du blob) restent bloquants :
+# ils passent par run_in_threadpool, les requêtes SQL sont attendues.
 @router.post("/")
 async def create_norme(
+    background_tasks: BackgroundTasks,
     codification: str = Form(...),
     nom: str = Form(...),
     date_creation: date = Form(...),
     secteur_id: int = Form(...),
     fichier_pdf: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db=Depends(get_db)
 ):
+    tmp_path = None
     try:
         # Vérifier l'extension PDF
         if not fichier_pdf.filename.lower().endswith(".pdf"):
             return error_response(message="Le fichier doit être un PDF", status_code=400)
 
         # Vérifier si le secteur existe
-        secteur = db.query(Secteur).filter(Secteur.id == secteur_id).first()
+        secteur = (await db.execute(select(Secteur.id, Secteur.nom).where(Secteur.id == secteur_id))).first()
         if not secteur:
             return error_response(message="Secteur non trouvé", status_code=404)
 
-        # Sauvegarder le fichier
-        file_path = UPLOAD_DIR / fichier_pdf.filename
-        with file_path.open("wb") as buffer:
-            copyfileobj(fichier_pdf.file, buffer)
+        # Recevoir le fichier (par blocs, taille limitée, SHA-256 calculé au passage)
+        try:
+            tmp_path, taille, sha256 = await run_in_threadpool(receive_upload, fichier_pdf)
+        except FichierTropVolumineux:
+            return error_response(message="Le fichier dépasse la taille maximale autorisée", status_code=413)
+        file_path = blob_path(sha256)
 
-        # Créer l'objet Norme
+        # Créer l'objet Norme, la ligne secteurs_stats verrouillée d'abord
+        stats = await lock_secteur_stats(db, [secteur_id])
         db_norme = Norme(
             codification=codification,
             nom=nom,
             date_creation=date_creation,
             secteur_id=secteur_id,
-            fichier_pdf=str(file_path)
+            fichier_pdf=str(file_path),
+            fichier_sha256=sha256,
+            fichier_taille=taille,
+            fichier_modifie_le=datetime.utcnow()
         )
         db.add(db_norme)
-        db.commit()
-        db.refresh(db_norme)
+        await db.flush()
+        norme_id = db_norme.id
+        record_change(db, "normes", norme_id, "insert")
+        await apply_secteur_stats(db, stats, added=[(secteur_id, date_creation)])
+        await bump_version(db, "normes")
+        await db.commit()
+        invalidate("normes")
+        forget_norme_reads(norme_id)
+        # Le fichier n'est rangé qu'une fois la référence commitée ; s'il ne
+        # peut pas l'être, la création est annulée
+        try:
+            await store_blob(tmp_path, sha256)
+        except OSError:
+            logger.exception("Rangement du PDF de la norme %s impossible", norme_id)
+            return await compensate_unstored_blob(
+                db, norme_id, tmp_path, lambda: remove_norme(db, norme_id),
+                "Le fichier PDF n'a pas pu être enregistré, la norme n'a pas été créée"
+            )
+        normes_index.add(norme_id, norme_search_text(nom, codification))
+        # Extraction du texte après l'envoi de la réponse
+        background_tasks.add_task(index_norme_pdf, norme_id, str(file_path))
 
+        # Réponse construite à partir des valeurs connues : pas de refresh ni de lazy-load
         return success_response(
-    data={
-        "id": db_norme.id,
-        "codification": db_norme.codification,
-        "nom": db_norme.nom,
-        "date_creation": db_norme.date_creation.isoformat(),  # <- convertir en string
-        "fichier_pdf": db_norme.fichier_pdf,
-        "secteur": {"id": secteur.id, "nom": secteur.nom}
-    },
-    message="Norme créée avec succès"
-)
+            data={
+                "id": norme_id,
+                "codification": codification,
+                "nom": nom,
+                "date_creation": date_creation,
+                "fichier_pdf": str(file_path),
+                "secteur": {"id": secteur.id, "nom": secteur.nom}
+            },
+            message="Norme créée avec succès",
+            schema=NormeData
+        )
     except IntegrityError:
-           db.rollback()
-           return error_response(message=f"La codification '{codification}' existe déjà", status_code=400)
+        await db.rollback()
+        if tmp_path:
+            await run_in_threadpool(tmp_path.unlink, missing_ok=True)
+        return error_response(message=f"La codification '{codification}' existe déjà", status_code=400)
+    except DBAPIError:
+        # Interblocage, délai de verrou, connexion perdue… : rien n'est écrit
+        await db.rollback()
+        if tmp_path:
+            await run_in_threadpool(tmp_path.unlink, missing_ok=True)
+        return error_response(message="La base de données n'a pas pu enregistrer la norme, réessayez", status_code=503)
+
+
+# ----------------- Importer des normes en masse -----------------
+@router.post("/import")
+async def import_normes_archive(
+    background_tasks: BackgroundTasks,
+    manifeste: UploadFile = File(...),
+    archive: UploadFile = File(...),
+    db=Depends(get_db)
+):
+    # Manifeste CSV + archive ZIP des PDF : cf. app/utils/bulk_import.py
+    if manifeste.size is not None and manifeste.size > MAX_MANIFESTE_SIZE:
+        return error_response(message="Le manifeste dépasse la taille maximale autorisée", status_code=413)
+    content = await manifeste.read()
+    try:
+        rapport = await import_normes(db, content, archive.file)
+    except (ManifesteInvalide, ArchiveInvalide) as e:
+        return error_response(message=str(e), status_code=400)
+
+    for norme in rapport["normes"]:
+        forget_norme_reads(norme["id"])
+        # Extraction du texte après l'envoi de la réponse
+        background_tasks.add_task(index_norme_pdf, norme["id"], norme["fichier_pdf"])
+
+    return success_response(
+        data=rapport,
+        message=f"{rapport['importees']} norme(s) importée(s) sur {rapport['total']}",
+        schema=NormeImportData
+    )
 
       
 # ----------------- Lire tous les Normes -----------------
+SORT_KEYS = {
+    "id": ((Norme.id,), False),
+    "-id": ((Norme.id,), True),
+    "date_creation": ((Norme.date_creation, Norme.id), False),
+    "-date_creation": ((Norme.date_creation, Norme.id), True),
+}
+
+def filter_normes(stmt, secteur_id=None, date_from=None, date_to=None, codification=None):
+    # Filtres traduits en prédicats SQL (index normes(secteur_id, date_creation))
+    if secteur_id is not None:
+        stmt = stmt.where(Norme.secteur_id == secteur_id)
+    if date_from is not None:
+        stmt = stmt.where(Norme.date_creation >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Norme.date_creation <= date_to)
+    if codification:
+        # Préfixe : LIKE 'xxx%' reste un parcours de plage sur l'index unique
+        prefix = codification.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = stmt.where(Norme.codification.like(prefix + "%", escape="\\"))
+    return stmt
+
 @router.get("/")
-def read_normes(db: Session = Depends(get_db)):
-    normes = db.query(Norme).all()
+async def read_normes(
+    request: Request,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: Optional[str] = None,
+    secteur_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    codification: Optional[str] = None,
+    sort: str = Query("id", pattern="^-?(id|date_creation)$"),
+    db=Depends(get_db)
+):
+    # Le nom du secteur fait partie de chaque ligne
+    etag, not_modified = await check_versions(request, db, "normes", "secteurs")
+    if not_modified:
+        return not_modified
+
+    stmt = filter_normes(normes_select(), secteur_id, date_from, date_to, codification)
+
+    # Tri : la clé du curseur suit l'ordre demandé, l'id départage les égalités
+    keys, descending = SORT_KEYS[sort]
+    try:
+        rows, next_cursor = await paginate(db, stmt, keys, limit, after, descending=descending)
+    except CurseurInvalide:
+        return error_response(message="Curseur de pagination invalide", status_code=400)
+    data = [norme_to_dict(row) for row in rows]
+    return with_etag(paginated_response(data=data, next_cursor=next_cursor, schema=NormeData), etag)
+
+# ----------------- Exporter tout le catalogue -----------------
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXPORT_CSV_COLONNES = ["id", "codification", "nom", "date_creation", "fichier_pdf", "secteur_id", "secteur_nom"]
+
+def export_select():
+    # yield_per active un curseur côté serveur : les lignes arrivent par lots
+    return normes_select().order_by(Norme.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+def iter_export_batches():
+    db = SessionLocal()
+    try:
+        yield from db.execute(export_select()).partitions()
+    finally:
+        db.close()
+
+async def iter_export_rows():
+    # Session propre au générateur : celle de get_db est fermée avant l'envoi du corps
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(export_select())
+            async for row in result:
+                yield row
+        return
+    # Mode synchrone : un passage dans le pool de threads par lot, pas par ligne
+    async for batch in iterate_in_threadpool(iter_export_batches()):
+        for row in batch:
+            yield row
+
+norme_adapter = TypeAdapter(NormeData)
+
+async def iter_export_ndjson():
+    buffer = []
+    size = 0
+    async for row in iter_export_rows():
+        line = norme_adapter.dump_json(norme_to_dict(row)) + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+async def iter_export_csv():
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_CSV_COLONNES)
+    # L'en-tête part tout de suite, avant la première ligne lue en base
+    yield output.getvalue().encode("utf-8")
+    output.seek(0)
+    output.truncate()
+    async for row in iter_export_rows():
+        writer.writerow([
+            row.id,
+            row.codification,
+            row.nom,
+            row.date_creation.isoformat() if row.date_creation else "",
+            row.fichier_pdf,
+            row.secteur_id,
+            row.secteur_nom
+        ])
+        if output.tell() >= EXPORT_CHUNK_SIZE:
+            yield output.getvalue().encode("utf-8")
+            output.seek(0)
+            output.truncate()
+    if output.tell():
+        yield output.getvalue().encode("utf-8")
+
+@router.get("/export")
+async def export_normes(format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    if format == "csv":
+        return StreamingResponse(
+            iter_export_csv(),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="normes.csv"'}
+        )
+    return StreamingResponse(
+        iter_export_ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="normes.ndjson"'}
+    )
+
+# ----------------- Facettes -----------------
+@router.get("/facets")
+async def normes_facets(
+    request: Request,
+    secteur_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    codification: Optional[str] = None,
+    db=Depends(get_db)
+):
+    # Nombre de normes par secteur et par année, avec les filtres de GET /normes/ :
+    # des GROUP BY en base, sans transférer le catalogue
+    etag, not_modified = await check_versions(request, db, "normes", "secteurs")
+    if not_modified:
+        return not_modified
+    filters = (secteur_id, date_from, date_to, codification)
+    filtered = secteur_id is not None or date_from is not None or date_to is not None or bool(codification)
+
+    if filtered:
+        nb_normes = func.count(Norme.id)
+        secteurs_stmt = filter_normes(
+            select(Secteur.id, Secteur.nom, nb_normes.label("nb_normes"))
+            .join(Norme, Norme.secteur_id == Secteur.id), *filters
+        ).group_by(Secteur.id, Secteur.nom)
+    else:
+        # Sans filtre : comptes déjà agrégés dans secteurs_stats
+        nb_normes = SecteurStats.nb_normes
+        secteurs_stmt = select(Secteur.id, Secteur.nom, nb_normes.label("nb_normes")).join(
+            SecteurStats, SecteurStats.secteur_id == Secteur.id
+        ).where(SecteurStats.nb_normes > 0)
+    secteurs = (await db.execute(secteurs_stmt.order_by(nb_normes.desc(), Secteur.nom))).all()
+
+    annee = extract("year", Norme.date_creation)
+    annees = (await db.execute(
+        filter_normes(select(annee.label("annee"), func.count(Norme.id).label("nb_normes")), *filters)
+        .group_by(annee)
+        .order_by(annee)
+    )).all()
+
+    return with_etag(success_response(
+        data={
+            "total": sum(row.nb_normes for row in annees),
+            "secteurs": [{"id": row.id, "nom": row.nom, "nb_normes": row.nb_normes} for row in secteurs],
+            "annees": [{"annee": row.annee, "nb_normes": row.nb_normes} for row in annees],
+        },
+        schema=NormeFacetsData
+    ), etag)
+
+# ----------------- Lire plusieurs Normes -----------------
+@router.post("/batch-get")
+async def batch_get_normes(batch: NormeBatchGet, db=Depends(get_db)):
+    # Une seule requête IN jointe aux secteurs, au lieu d'un GET /normes/{id} par id
+    ids = list(dict.fromkeys(batch.ids))
+    result = await db.execute(normes_select().where(Norme.id.in_(ids)))
+    rows = {row.id: row for row in result}
+    return success_response(
+        data={
+            # Ordre de la demande, chaque id une seule fois
+            "normes": [norme_to_dict(rows[norme_id]) for norme_id in ids if norme_id in rows],
+            "manquants": [norme_id for norme_id in ids if norme_id not in rows]
+        },
+        schema=NormeBatchData
+    )
+
+# ----------------- Modifier / supprimer plusieurs Normes -----------------
+# Une requête par étape pour tout le lot, un seul commit : le lot est appliqué
+# entièrement ou pas du tout
+@router.post("/bulk-update")
+async def bulk_update_normes(batch: NormeBulkUpdate, db=Depends(get_db)):
+    values = {}
+    if batch.nom and batch.nom.strip():
+        values["nom"] = batch.nom.strip()
+    if batch.date_creation:
+        values["date_creation"] = batch.date_creation
+    if batch.secteur_id:
+        secteur = await db.scalar(select(Secteur.id).where(Secteur.id == batch.secteur_id))
+        if secteur is None:
+            return error_response(message="Secteur non trouvé", status_code=404)
+        values["secteur_id"] = batch.secteur_id
+    if not values:
+        return error_response(message="Aucune modification demandée", status_code=400)
+
+    ids = list(dict.fromkeys(batch.ids))
+    moves = "secteur_id" in values or "date_creation" in values
+    if moves:
+        # Les compteurs des secteurs touchés changent : lignes secteurs_stats verrouillées d'abord
+        stats, rows = await lock_normes(db, ids, Norme.codification, secteur_ids=[values.get("secteur_id")])
+        rows = list(rows.values())
+    else:
+        result = await db.execute(select(Norme.id, Norme.codification).where(Norme.id.in_(ids)))
+        rows = result.all()
+    codifications = {row.id: row.codification for row in rows}
+    found = [norme_id for norme_id in ids if norme_id in codifications]
+
+    if found:
+        await db.execute(update(Norme).where(Norme.id.in_(found)).values(**values))
+        await record_changes(db, "normes", found, "update")
+        if moves:
+            await apply_secteur_stats(
+                db, stats,
+                added=[(values.get("secteur_id", row.secteur_id), values.get("date_creation", row.date_creation)) for row in rows],
+                removed=[(row.secteur_id, row.date_creation) for row in rows]
+            )
+        await bump_version(db, "normes")
+        await db.commit()
+        invalidate("normes")
+        for norme_id in found:
+            forget_norme_reads(norme_id)
+            if "nom" in values:
+                normes_index.add(norme_id, norme_search_text(values["nom"], codifications[norme_id]))
+
+    return success_response(
+        data={"ids": found, "manquants": [norme_id for norme_id in ids if norme_id not in codifications]},
+        message=f"{len(found)} norme(s) mise(s) à jour",
+        schema=NormeBulkData
+    )
+
+
+@router.post("/bulk-delete")
+async def bulk_delete_normes(batch: NormeBulkDelete, background_tasks: BackgroundTasks, db=Depends(get_db)):
+    ids = list(dict.fromkeys(batch.ids))
+    stats, rows = await lock_normes(db, ids, Norme.fichier_pdf, Norme.fichier_sha256)
+    fichiers = {row.id: (row.fichier_sha256, row.fichier_pdf) for row in rows.values()}
+    found = [norme_id for norme_id in ids if norme_id in fichiers]
+
+    if found:
+        await drop_normes_text(db, found)
+        await db.execute(delete(Norme).where(Norme.id.in_(found)))
+        await record_changes(db, "normes", found, "delete")
+        await apply_secteur_stats(db, stats, removed=[(row.secteur_id, row.date_creation) for row in rows.values()])
+        await bump_version(db, "normes")
+        await db.commit()
+        invalidate("normes")
+        for norme_id in found:
+            forget_norme_reads(norme_id)
+            normes_index.remove(norme_id)
+            contenus_index.remove(norme_id)
+        # PDF qui ne sont plus référencés : supprimés après l'envoi de la réponse
+        background_tasks.add_task(run_with_session, release_blobs, list(fichiers.values()))
+
+    return success_response(
+        data={"ids": found, "manquants": [norme_id for norme_id in ids if norme_id not in fichiers]},
+        message=f"{len(found)} norme(s) supprimée(s)",
+        schema=NormeBulkData
+    )
+
+# ----------------- Télécharger plusieurs PDF -----------------
+@router.get("/archive.zip")
+async def download_normes(ids: list[int] = Query(..., max_length=MAX_LIMIT), db=Depends(get_db)):
+    rows = (await db.execute(
+        select(Norme.id, Norme.codification, Norme.fichier_pdf, Norme.fichier_modifie_le)
+        .where(Norme.id.in_(set(ids)))
+    )).all()
+    if not rows:
+        return error_response(message="Norme non trouvée", status_code=404)
+    # Entrées dans l'ordre des ids demandés
+    by_id = {row.id: row for row in rows}
+    return normes_zip_response([by_id[i] for i in dict.fromkeys(ids) if i in by_id], "normes.zip")
+
+# ----------------- Recherche plein texte -----------------
+async def search_norme_hits(db, q: str, scope: str, offset: int, count: int) -> list:
+    """Retourne [(norme_id, score)] par pertinence décroissante."""
+    if db.bind.dialect.name == "mysql":
+        # Index FULLTEXT normes(nom, codification) ou normes_textes(contenu)
+        if scope == "content":
+            score = match(NormeTexte.contenu, against=boolean_query(q)).in_boolean_mode()
+            stmt = select(NormeTexte.norme_id.label("id"), score.label("score"))
+            key = NormeTexte.norme_id
+        else:
+            score = match(Norme.nom, Norme.codification, against=boolean_query(q)).in_boolean_mode()
+            stmt = select(Norme.id, score.label("score"))
+            key = Norme.id
+        rows = (await db.execute(
+            stmt.where(score > 0)
+            .order_by(score.desc(), key)
+            .offset(offset)
+            .limit(count)
+        )).all()
+        return [(row.id, float(row.score)) for row in rows]
+
+    # Repli : index inversé en mémoire, chargé au premier appel et rechargé
+    # quand un worker a écrit (versions lues avant les données, comme pour
+    # les caches de lecture)
+    if scope == "content":
+        index = contenus_index
+        version = await version_stamps.get(db, "normes", "normes_textes")
+        if not index.loaded or index.version != version:
+            result = await db.execute(select(NormeTexte.norme_id, NormeTexte.contenu))
+            index.load(((row.norme_id, row.contenu) for row in result), version)
+    else:
+        index = normes_index
+        version = await version_stamps.get(db, "normes")
+        if not index.loaded or index.version != version:
+            result = await db.execute(select(Norme.id, Norme.nom, Norme.codification))
+            index.load(((row.id, norme_search_text(row.nom, row.codification)) for row in result), version)
+    return index.search(q)[offset:offset + count]
+
+@router.get("/search")
+async def search_normes(
+    q: str = Query(..., min_length=1),
+    scope: str = Query("metadata", pattern="^(metadata|content)$"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: Optional[str] = None,
+    db=Depends(get_db)
+):
+    # Le classement par score se pagine par position : le curseur porte l'offset
+    offset = 0
+    if after is not None:
+        try:
+            values = decode_cursor(after)
+        except CurseurInvalide:
+            values = None
+        if not values or len(values) != 1 or not isinstance(values[0], int) or values[0] < 0:
+            return error_response(message="Curseur de pagination invalide", status_code=400)
+        offset = values[0]
+
+    if not tokenize(q):
+        return paginated_response(data=[], next_cursor=None, schema=NormeSearchData)
+
+    # scope=content : recherche dans le texte extrait des PDF
+    hits = await search_norme_hits(db, q, scope, offset, limit + 1)
+    next_cursor = encode_cursor([offset + limit]) if len(hits) > limit else None
+    hits = hits[:limit]
+
+    result = await db.execute(normes_select().where(Norme.id.in_([norme_id for norme_id, _ in hits])))
+    rows = {row.id: row for row in result}
     data = [
-        {
-            "id": n.id,
-            "codification": n.codification,
-            "nom": n.nom,
-            "date_creation": n.date_creation.isoformat() if n.date_creation else None,
-            "fichier_pdf": n.fichier_pdf,
-            "secteur": {
-                "id": n.secteur.id,
-                "nom": n.secteur.nom
-            } if n.secteur else None
-        }
-        for n in normes
+        dict(norme_to_dict(rows[norme_id]), score=round(score, 4))
+        for norme_id, score in hits
+        if norme_id in rows
     ]
-    return success_response(data=data)
+    return paginated_response(data=data, next_cursor=next_cursor, schema=NormeSearchData)
+
+# ----------------- Flux des modifications -----------------
+@router.get("/changes")
+async def read_changes(
+    since: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    db=Depends(get_db)
+):
+    # Insertions, modifications et suppressions de normes et de secteurs après
+    # le curseur `since` (tout le journal sans curseur) : le coût suit le
+    # nombre de modifications, pas la taille du catalogue. Chaque objet
+    # n'apparaît qu'une fois par page, avec son état actuel.
+    last_id = 0
+    if since is not None:
+        try:
+            values = decode_cursor(since)
+        except CurseurInvalide:
+            values = None
+        if not values or len(values) != 1 or not isinstance(values[0], int) or values[0] < 0:
+            return error_response(message="Curseur de pagination invalide", status_code=400)
+        last_id = values[0]
+
+    changes, has_more = await read_journal(db, last_id, limit)
+    entries = collapse_changes(changes)
+
+    # État actuel des objets encore présents, une requête par entité
+    ids = {"normes": [], "secteurs": []}
+    for entite, objet_id, operation, _ in entries:
+        if operation != "delete":
+            ids[entite].append(objet_id)
+    normes = {}
+    if ids["normes"]:
+        result = await db.execute(normes_select().where(Norme.id.in_(ids["normes"])))
+        normes = {row.id: norme_to_dict(row) for row in result}
+    secteurs = {}
+    if ids["secteurs"]:
+        result = await db.execute(select(Secteur.id, Secteur.nom).where(Secteur.id.in_(ids["secteurs"])))
+        secteurs = {row.id: {"id": row.id, "nom": row.nom} for row in result}
+    current = {"normes": normes, "secteurs": secteurs}
+
+    data = []
+    for entite, objet_id, operation, modifie_le in entries:
+        state = None
+        if operation != "delete":
+            state = current[entite].get(objet_id)
+            if state is None:
+                # Supprimé depuis : la suppression suit plus loin dans le journal
+                continue
+        data.append({"entite": entite, "id": objet_id, "operation": operation, "modifie_le": modifie_le, "data": state})
+
+    if changes:
+        last_id = changes[-1].id
+    return success_response(
+        data={"changes": data, "cursor": encode_cursor([last_id]) if last_id else None, "has_more": has_more},
+        schema=CatalogueChangesData
+    )
 
 # ----------------- Lire une Norme -----------------
 @router.get("/{norme_id}")
-def read_norme(norme_id: int, db: Session = Depends(get_db)):
-    db_norme = db.query(Norme).filter(Norme.id == norme_id).first()
-    if not db_norme:
+async def read_norme(norme_id: int, request: Request, db=Depends(get_db)):
+    etag, not_modified = await check_versions(request, db, "normes", "secteurs")
+    if not_modified:
+        return not_modified
+    data = await normes_cache.get_or_load(db, norme_id, lambda: fetch_norme_data(norme_id))
+    if not data:
         return error_response(message="Norme non trouvée", status_code=404)
 
-    return success_response(
-        data={
-            "id": db_norme.id,
-            "codification": db_norme.codification,
-            "nom": db_norme.nom,
-            "date_creation": db_norme.date_creation.isoformat() if db_norme.date_creation else None,
-            "fichier_pdf": db_norme.fichier_pdf,
-            "secteur": {
-                "id": db_norme.secteur.id,
-                "nom": db_norme.secteur.nom
-            } if db_norme.secteur else None
-        }
-    )
+    return with_etag(success_response(data=data, schema=NormeData), etag)
 
 # ----------------- Supprimer une Norme -----------------
 @router.delete("/{norme_id}")
-def delete_norme(norme_id: int, db: Session = Depends(get_db)):
-    db_norme = db.query(Norme).filter(Norme.id == norme_id).first()
+async def delete_norme(norme_id: int, background_tasks: BackgroundTasks, db=Depends(get_db)):
+    # Supprimer la norme de la DB (et son texte indexé)
+    db_norme = await remove_norme(db, norme_id, Norme.codification, Norme.fichier_pdf, Norme.fichier_sha256)
     if not db_norme:
         return error_response(message="Norme non trouvée", status_code=404)
 
-    # Supprimer le fichier PDF
-    try:
-        pdf_path = Path(db_norme.fichier_pdf)
-        if pdf_path.exists():
-            pdf_path.unlink()
-    except Exception as e:
-        return error_response(message=f"Erreur lors de la suppression du PDF: {e}", status_code=500)
-
-    # Supprimer la norme de la DB
-    db.delete(db_norme)
-    db.commit()
+    # La suppression est commitée : le PDF, s'il n'est plus référencé, est
+    # supprimé après l'envoi de la réponse (un échec y est journalisé)
+    background_tasks.add_task(run_with_session, release_blobs, [(db_norme.fichier_sha256, db_norme.fichier_pdf)])
 
     return success_response(
         data={"id": db_norme.id, "codification": db_norme.codification},
@@ -141,72 +695,168 @@ def delete_norme(norme_id: int, db: Session = Depends(get_db)):
     )
 
 
+async def restore_norme_fichier(db, norme_id: int, previous):
+    # Remet le PDF précédent (encore stocké : il n'est libéré qu'ensuite)
+    await db.execute(update(Norme).where(Norme.id == norme_id).values(
+        fichier_pdf=previous.fichier_pdf,
+        fichier_sha256=previous.fichier_sha256,
+        fichier_taille=previous.fichier_taille,
+        fichier_modifie_le=previous.fichier_modifie_le
+    ))
+    record_change(db, "normes", norme_id, "update")
+    await bump_version(db, "normes")
+    await db.commit()
+    invalidate("normes")
+    forget_norme_reads(norme_id)
+
+
 @router.put("/{norme_id}")
 async def update_norme(
     norme_id: int,
+    background_tasks: BackgroundTasks,
     codification: str = Form(None),
     nom: str = Form(None),
     date_creation: str = Form(None),  # on convertira en date ensuite
     secteur_id: int = Form(None),
     fichier_pdf: UploadFile = File(None),
-    db: Session = Depends(get_db)
+    db=Depends(get_db)
 ):
-    db_norme = db.query(Norme).filter(Norme.id == norme_id).first()
-    if not db_norme:
+    current = (await db.execute(
+        select(Norme.fichier_pdf, Norme.fichier_sha256, Norme.fichier_taille, Norme.fichier_modifie_le)
+        .where(Norme.id == norme_id)
+    )).first()
+    if not current:
         return error_response(message="Norme non trouvée", status_code=404)
 
+    values = {}
     if codification:
-        db_norme.codification = codification.strip()
+        values["codification"] = codification.strip()
     if nom:
-        db_norme.nom = nom.strip()
+        values["nom"] = nom.strip()
     if date_creation:
-        db_norme.date_creation = datetime.strptime(date_creation, "%Y-%m-%d").date()
+        values["date_creation"] = datetime.strptime(date_creation, "%Y-%m-%d").date()
     if secteur_id:
-        secteur = db.query(Secteur).filter(Secteur.id == secteur_id).first()
-        if not secteur:
+        secteur = await db.scalar(select(Secteur.id).where(Secteur.id == secteur_id))
+        if secteur is None:
             return error_response(message="Secteur non trouvé", status_code=404)
-        db_norme.secteur_id = secteur_id
+        values["secteur_id"] = secteur_id
 
     if fichier_pdf:
         if not fichier_pdf.filename.lower().endswith(".pdf"):
             return error_response(message="Le fichier doit être un PDF", status_code=400)
-        old_path = Path(db_norme.fichier_pdf)
-        if old_path.exists():
-            old_path.unlink()
-        file_path = UPLOAD_DIR / fichier_pdf.filename
-        with file_path.open("wb") as buffer:
-            copyfileobj(fichier_pdf.file, buffer)
-        db_norme.fichier_pdf = str(file_path)
+        try:
+            tmp_path, taille, sha256 = await run_in_threadpool(receive_upload, fichier_pdf)
+        except FichierTropVolumineux:
+            return error_response(message="Le fichier dépasse la taille maximale autorisée", status_code=413)
+        values["fichier_pdf"] = str(blob_path(sha256))
+        values["fichier_sha256"] = sha256
+        values["fichier_taille"] = taille
+        values["fichier_modifie_le"] = datetime.utcnow()
+
+    try:
+        if values:
+            moves = "secteur_id" in values or "date_creation" in values
+            if moves:
+                # Secteur ou date changés : lignes secteurs_stats verrouillées avant la norme
+                stats, rows = await lock_normes(db, [norme_id], secteur_ids=[values.get("secteur_id")])
+                old = rows.get(norme_id)
+                if old is None:
+                    await db.rollback()
+                    if fichier_pdf:
+                        await run_in_threadpool(tmp_path.unlink, missing_ok=True)
+                    return error_response(message="Norme non trouvée", status_code=404)
+            await db.execute(update(Norme).where(Norme.id == norme_id).values(**values))
+            record_change(db, "normes", norme_id, "update")
+            if moves:
+                await apply_secteur_stats(
+                    db, stats,
+                    added=[(values.get("secteur_id", old.secteur_id), values.get("date_creation", old.date_creation))],
+                    removed=[(old.secteur_id, old.date_creation)]
+                )
+            await bump_version(db, "normes")
+        await db.commit()
+        invalidate("normes")
+        forget_norme_reads(norme_id)
+    except IntegrityError:
+        await db.rollback()
+        if fichier_pdf:
+            await run_in_threadpool(tmp_path.unlink, missing_ok=True)
+        return error_response(message=f"La codification '{codification}' existe déjà", status_code=400)
+    except DBAPIError:
+        # Interblocage, délai de verrou, connexion perdue… : rien n'est écrit
+        await db.rollback()
+        if fichier_pdf:
+            await run_in_threadpool(tmp_path.unlink, missing_ok=True)
+        return error_response(message="La base de données n'a pas pu enregistrer la modification, réessayez", status_code=503)
+
+    # Le nouveau PDF est rangé une fois la mise à jour commitée ; l'ancien est
+    # libéré après l'envoi de la réponse, comme pour une suppression
+    if "fichier_pdf" in values:
+        try:
+            await store_blob(tmp_path, values["fichier_sha256"])
+        except OSError:
+            logger.exception("Rangement du PDF de la norme %s impossible", norme_id)
+            return await compensate_unstored_blob(
+                db, norme_id, tmp_path, lambda: restore_norme_fichier(db, norme_id, current),
+                "Le fichier PDF n'a pas pu être enregistré, le PDF précédent est conservé"
+            )
+        if values["fichier_pdf"] != current.fichier_pdf:
+            background_tasks.add_task(run_with_session, release_blobs, [(current.fichier_sha256, current.fichier_pdf)])
 
-    db.commit()
-    db.refresh(db_norme)
+    data = await get_norme_data(db, norme_id)
+    normes_index.add(norme_id, norme_search_text(data["nom"], data["codification"]))
+    if "fichier_pdf" in values:
+        # Nouveau PDF : ré-indexation du texte après l'envoi de la réponse
+        background_tasks.add_task(index_norme_pdf, norme_id, values["fichier_pdf"])
 
     return success_response(
-        data={
-            "id": db_norme.id,
-            "codification": db_norme.codification,
-            "nom": db_norme.nom,
-            "date_creation": db_norme.date_creation.isoformat() if db_norme.date_creation else None,
-            "fichier_pdf": db_norme.fichier_pdf,
-            "secteur": {"id": db_norme.secteur.id, "nom": db_norme.secteur.nom} if db_norme.secteur else None
-        },
-        message="Norme mise à jour avec succès"
+        data=data,
+        message="Norme mise à jour avec succès",
+        schema=NormeData
     )
     
     
 @router.get("/{norme_id}/pdf")
-def view_norme_pdf(norme_id: int, db: Session = Depends(get_db)):
-    db_norme = db.query(Norme).filter(Norme.id == norme_id).first()
+async def view_norme_pdf(norme_id: int, request: Request):
+    db_norme = await fetch_norme_fichier(norme_id)
     if not db_norme:
         return error_response(message="Norme non trouvée", status_code=404)
 
-    pdf_path = Path(db_norme.fichier_pdf)
-    if not pdf_path.exists():
+    # Validateurs tirés de la base : le hash du contenu sert d'ETag fort
+    headers = {"Cache-Control": settings.PDF_CACHE_CONTROL}
+    etag = f'"{db_norme.fichier_sha256}"' if db_norme.fichier_sha256 else None
+    if etag:
+        headers["ETag"] = etag
+    if db_norme.fichier_modifie_le:
+        headers["Last-Modified"] = http_date(db_norme.fichier_modifie_le)
+
+    # 304 sans toucher au fichier
+    if is_not_modified(request, etag, db_norme.fichier_modifie_le):
+        return Response(status_code=304, headers=headers)
+
+    # Le proxy frontal lit et envoie le fichier (Range compris) : le worker
+    # n'a fait qu'autoriser la requête et résoudre le chemin
+    if settings.PDF_DELIVERY == "x-accel-redirect":
+        uri = accel_redirect_uri(db_norme.fichier_pdf)
+        if uri:
+            headers["X-Accel-Redirect"] = uri
+            return Response(media_type="application/pdf", headers=headers)
+    elif settings.PDF_DELIVERY == "x-sendfile":
+        headers["X-Sendfile"] = os.path.abspath(db_norme.fichier_pdf)
+        return Response(media_type="application/pdf", headers=headers)
+
+    try:
+        stat_result = await run_in_threadpool(os.stat, db_norme.fichier_pdf)
+    except FileNotFoundError:
         return error_response(message="Fichier PDF introuvable", status_code=404)
 
-    # FileResponse va afficher le PDF directement dans le navigateur
-    return FileResponse(
-        path=str(pdf_path),
-        media_type="application/pdf"
+    # RangeFileResponse va afficher le PDF directement dans le navigateur ; il
+    # gère Range (simple et multiple, multipart/byteranges) et If-Range à
+    # partir des ETag / Last-Modified fournis ici
+    return RangeFileResponse(
+        path=db_norme.fichier_pdf,
+        media_type="application/pdf",
+        headers=headers,
+        stat_result=stat_result
         # pas de "filename" ici pour éviter le téléchargement automatique
     )
@@ -1,112 +1,198 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import select, exists, func, delete
 from sqlalchemy.exc import IntegrityError
 from app.models.secteur import Secteur
-from app.config.database import SessionLocal
-from app.schemas import SecteurCreate
-from app.utils.response import success_response, error_response
+from app.models.norme import Norme
+from app.models.secteur_stats import SecteurStats
+from app.config.database import get_db
+from app.schemas import SecteurCreate, SecteurData, SecteurStatsData
+from app.utils.response import success_response, error_response, paginated_response
+from app.utils.pagination import paginate, CurseurInvalide, DEFAULT_LIMIT, MAX_LIMIT
+from app.utils.cache import secteurs_cache, bump_version, invalidate
+from app.utils.http_cache import check_versions, with_etag
+from app.utils.changes import record_change, record_secteur_normes
+from app.utils.zip_stream import normes_zip_response
 
 router = APIRouter(prefix="/secteurs", tags=["Secteurs"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.post("/")
-def create_secteur(secteur: SecteurCreate, db: Session = Depends(get_db)):
+async def create_secteur(secteur: SecteurCreate, db=Depends(get_db)):
     try:
         # Vérification du champ obligatoire
         if not secteur.nom or not secteur.nom.strip():
             return error_response(message="Le champ 'nom' est obligatoire", status_code=400)
 
         # Vérifier si le secteur existe déjà
-        existing = db.query(Secteur).filter(Secteur.nom == secteur.nom.strip()).first()
-        if existing:
+        existing = await db.scalar(select(Secteur.id).where(Secteur.nom == secteur.nom.strip()).limit(1))
+        if existing is not None:
             return error_response(message="Ce secteur existe déjà", status_code=400)
 
         # Créer le secteur
         db_secteur = Secteur(nom=secteur.nom.strip())
         db.add(db_secteur)
-        db.commit()
-        db.refresh(db_secteur)
+        await db.flush()
+        # Ligne d'agrégats créée avec le secteur : les écritures sur ses normes ne font que l'incrémenter
+        db.add(SecteurStats(secteur_id=db_secteur.id, nb_normes=0))
+        record_change(db, "secteurs", db_secteur.id, "insert")
+        await bump_version(db, "secteurs")
+        await db.commit()
+        invalidate("secteurs")
+        await db.refresh(db_secteur)
 
         return success_response(
             data={"id": db_secteur.id, "nom": db_secteur.nom},
-            message="Secteur créé avec succès"
+            message="Secteur créé avec succès",
+            schema=SecteurData
         )
 
     except Exception as e:
+        await db.rollback()
         return error_response(message=str(e))
 
 # ----------------- Lire tous les Secteurs -----------------
 @router.get("/")
-def read_secteurs(db: Session = Depends(get_db)):
-    secteurs = db.query(Secteur).all()
-    data = [{"id": s.id, "nom": s.nom} for s in secteurs]
-    return success_response(data=data)
+async def read_secteurs(
+    request: Request,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: Optional[str] = None,
+    with_stats: bool = False,
+    db=Depends(get_db)
+):
+    if with_stats:
+        return await read_secteurs_stats(request, limit, after, db)
+
+    etag, not_modified = await check_versions(request, db, "secteurs")
+    if not_modified:
+        return not_modified
+
+    async def load_page():
+        secteurs, next_cursor = await paginate(db, select(Secteur), Secteur.id, limit, after)
+        return [{"id": s.id, "nom": s.nom} for s in secteurs], next_cursor
+
+    try:
+        data, next_cursor = await secteurs_cache.get_or_load(db, (limit, after), load_page)
+    except CurseurInvalide:
+        return error_response(message="Curseur de pagination invalide", status_code=400)
+    return with_etag(paginated_response(data=data, next_cursor=next_cursor, schema=SecteurData), etag)
+
+
+async def read_secteurs_stats(request: Request, limit: int, after: Optional[str], db):
+    # Nombre de normes et dernière date_creation de chaque secteur, lus dans
+    # secteurs_stats (une jointure, pas d'agrégat sur normes). Ces chiffres
+    # changent avec les normes : ni cache des pages, ni ETag sur les seuls secteurs
+    etag, not_modified = await check_versions(request, db, "secteurs", "normes")
+    if not_modified:
+        return not_modified
+
+    stmt = select(
+        Secteur.id,
+        Secteur.nom,
+        func.coalesce(SecteurStats.nb_normes, 0).label("nb_normes"),
+        SecteurStats.derniere_date_creation,
+    ).outerjoin(SecteurStats, SecteurStats.secteur_id == Secteur.id)
+    try:
+        rows, next_cursor = await paginate(db, stmt, Secteur.id, limit, after)
+    except CurseurInvalide:
+        return error_response(message="Curseur de pagination invalide", status_code=400)
+    data = [
+        {"id": row.id, "nom": row.nom, "nb_normes": row.nb_normes, "derniere_date_creation": row.derniere_date_creation}
+        for row in rows
+    ]
+    return with_etag(paginated_response(data=data, next_cursor=next_cursor, schema=SecteurStatsData), etag)
 
 
 # ----------------- Lire un Secteur -----------------
 @router.get("/{secteur_id}")
-def read_secteur(secteur_id: int, db: Session = Depends(get_db)):
-    db_secteur = db.query(Secteur).filter(Secteur.id == secteur_id).first()
+async def read_secteur(secteur_id: int, request: Request, db=Depends(get_db)):
+    etag, not_modified = await check_versions(request, db, "secteurs")
+    if not_modified:
+        return not_modified
+    db_secteur = await db.get(Secteur, secteur_id)
     if not db_secteur:
         return error_response(message="Secteur non trouvé", status_code=404)
-    return success_response(data={"id": db_secteur.id, "nom": db_secteur.nom})
+    return with_etag(success_response(data={"id": db_secteur.id, "nom": db_secteur.nom}, schema=SecteurData), etag)
+
+
+# ----------------- Télécharger les PDF d'un Secteur -----------------
+@router.get("/{secteur_id}/normes.zip")
+async def download_secteur_normes(secteur_id: int, db=Depends(get_db)):
+    secteur = await db.scalar(select(Secteur.id).where(Secteur.id == secteur_id))
+    if secteur is None:
+        return error_response(message="Secteur non trouvé", status_code=404)
+    # Une seule requête pour toutes les normes ; les PDF sont lus pendant l'envoi
+    rows = (await db.execute(
+        select(Norme.codification, Norme.fichier_pdf, Norme.fichier_modifie_le)
+        .where(Norme.secteur_id == secteur_id)
+        .order_by(Norme.codification)
+    )).all()
+    return normes_zip_response(rows, f"secteur-{secteur_id}-normes.zip")
 
 
 # ----------------- Supprimer un Secteur -----------------
 @router.delete("/{secteur_id}")
-def delete_secteur(secteur_id: int, db: Session = Depends(get_db)):
-    db_secteur = db.query(Secteur).filter(Secteur.id == secteur_id).first()
+async def delete_secteur(secteur_id: int, db=Depends(get_db)):
+    db_secteur = (await db.execute(select(Secteur.id, Secteur.nom).where(Secteur.id == secteur_id))).first()
     if not db_secteur:
         return error_response(message="Secteur non trouvé", status_code=404)
 
-    # Vérifier s’il a des normes associées
-    if db_secteur.normes and len(db_secteur.normes) > 0:
+    # Vérifier s’il a des normes associées : EXISTS s'arrête à la première
+    # entrée de l'index normes(secteur_id, ...)
+    has_normes = await db.scalar(select(exists().where(Norme.secteur_id == secteur_id)))
+    if has_normes:
         return error_response(message="Impossible de supprimer un secteur qui contient des normes", status_code=400)
 
-    db.delete(db_secteur)
-    db.commit()
+    # DELETE direct : pas de chargement de Secteur.normes par la cascade de l'ORM
+    await db.execute(delete(SecteurStats).where(SecteurStats.secteur_id == secteur_id))
+    await db.execute(delete(Secteur).where(Secteur.id == secteur_id))
+    record_change(db, "secteurs", secteur_id, "delete")
+    await bump_version(db, "secteurs")
+    await db.commit()
+    invalidate("secteurs")
     return success_response(
         data={"id": db_secteur.id, "nom": db_secteur.nom},
-        message="Secteur supprimé avec succès"
+        message="Secteur supprimé avec succès",
+        schema=SecteurData
     )
 
 
 
 @router.put("/{secteur_id}")
-def update_secteur(secteur_id: int, secteur: SecteurCreate, db: Session = Depends(get_db)):
+async def update_secteur(secteur_id: int, secteur: SecteurCreate, db=Depends(get_db)):
     try:
         # Vérifier que le champ nom n'est pas vide
         if not secteur.nom or not secteur.nom.strip():
             return error_response(message="Le champ 'nom' est obligatoire", status_code=400)
 
-        db_secteur = db.query(Secteur).filter(Secteur.id == secteur_id).first()
+        db_secteur = await db.get(Secteur, secteur_id)
         if not db_secteur:
             return error_response(message="Secteur non trouvé", status_code=404)
 
         # Vérifier l'unicité du nom pour les autres secteurs
-        existing = db.query(Secteur).filter(
+        existing = await db.scalar(select(Secteur.id).where(
             Secteur.nom == secteur.nom.strip(),
             Secteur.id != secteur_id
-        ).first()
-        if existing:
+        ).limit(1))
+        if existing is not None:
             return error_response(message="Ce nom de secteur existe déjà", status_code=400)
 
         # Mettre à jour
         db_secteur.nom = secteur.nom.strip()
-        db.commit()
-        db.refresh(db_secteur)
+        record_change(db, "secteurs", secteur_id, "update")
+        # Le nom du secteur figure aussi dans le détail des normes
+        await record_secteur_normes(db, secteur_id)
+        await bump_version(db, "secteurs")
+        await bump_version(db, "normes")
+        await db.commit()
+        invalidate("secteurs", "normes")
+        await db.refresh(db_secteur)
 
         return success_response(
             data={"id": db_secteur.id, "nom": db_secteur.nom},
-            message="Secteur mis à jour avec succès"
+            message="Secteur mis à jour avec succès",
+            schema=SecteurData
         )
 
     except Exception as e:
+        await db.rollback()
         return error_response(message=str(e))
@@ -1,22 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
 from app.config.database import get_db
 from app.models.user import User
-from app.schemas.user import UserCreate, UserResponse
+from app.schemas.user import UserCreate, UserResponse, UserData
+from app.utils.response import error_response, paginated_response
+from app.utils.pagination import paginate, CurseurInvalide, DEFAULT_LIMIT, MAX_LIMIT
+from app.utils.cache import bump_version, invalidate
+from app.utils.http_cache import check_versions, with_etag
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.post("/", response_model=UserResponse)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def create_user(user: UserCreate, db=Depends(get_db)):
+    db_user = await db.scalar(select(User).where(User.email == user.email).limit(1))
     if db_user:
         raise HTTPException(status_code=400, detail="Email déjà utilisé")
     new_user = User(name=user.name, email=user.email)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await bump_version(db, "users")
+    await db.commit()
+    invalidate("users")
+    await db.refresh(new_user)
     return new_user
 
-@router.get("/", response_model=list[UserResponse])
-def get_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
+@router.get("/")
+async def get_users(
+    request: Request,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: Optional[str] = None,
+    db=Depends(get_db)
+):
+    etag, not_modified = await check_versions(request, db, "users")
+    if not_modified:
+        return not_modified
+    try:
+        users, next_cursor = await paginate(db, select(User), User.id, limit, after)
+    except CurseurInvalide:
+        return error_response(message="Curseur de pagination invalide", status_code=400)
+    data = [{"id": u.id, "name": u.name, "email": u.email} for u in users]
+    return with_etag(paginated_response(data=data, next_cursor=next_cursor, schema=UserData), etag)
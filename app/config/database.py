@@ -1,21 +1,199 @@
+import logging
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .settings import settings
+from app.utils.db_metrics import (
+    PoolMetrics,
+    TimedQueuePool,
+    TimedAsyncQueuePool,
+    RequestDbStats,
+    current_request_stats,
+    instrument_statements,
+    request_db_metrics,
+)
+
+logger = logging.getLogger(__name__)
 
-DATABASE_URL = (
+DATABASE_URL = settings.DATABASE_URL or (
     f"mysql+pymysql://{settings.DB_USER}:{settings.DB_PASSWORD}"
     f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
 )
 
-engine = create_engine(DATABASE_URL, echo=True)
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or (
+    f"mysql+aiomysql://{settings.DB_USER}:{settings.DB_PASSWORD}"
+    f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
+)
+
+SQL_ECHO = settings.DB_ECHO if settings.DB_ECHO is not None else settings.ENVIRONMENT == "development"
+
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+engine = create_engine(DATABASE_URL, echo=SQL_ECHO, poolclass=TimedQueuePool, **POOL_OPTIONS)
+pool_metrics = PoolMetrics(settings.DB_MAX_OVERFLOW)
+pool_metrics.attach(engine.pool)
+instrument_statements(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Mode asynchrone (DB_ASYNC) : les endpoints attendent MySQL sans occuper de thread
+async_engine = (
+    create_async_engine(ASYNC_DATABASE_URL, echo=SQL_ECHO, poolclass=TimedAsyncQueuePool, **POOL_OPTIONS)
+    if settings.DB_ASYNC else None
+)
+async_pool_metrics = PoolMetrics(settings.DB_MAX_OVERFLOW) if settings.DB_ASYNC else None
+if async_engine is not None:
+    async_pool_metrics.attach(async_engine.sync_engine.pool)
+    instrument_statements(async_engine.sync_engine)
+
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if settings.DB_ASYNC else None
+)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+
+class ThreadedSession:
+    """Interface d'AsyncSession au-dessus d'une Session synchrone.
+
+    Utilisée quand DB_ASYNC est désactivé : les endpoints `async def` écrivent
+    le même code dans les deux modes, et chaque appel bloquant s'exécute dans
+    le pool de threads. Comme AsyncSession, les résultats sont entièrement
+    chargés avant de revenir dans la boucle.
+    """
+
+    def __init__(self, sync_session):
+        self.sync_session = sync_session
+
+    @property
+    def bind(self):
+        return self.sync_session.get_bind()
+
+    def _execute(self, statement, params=None, **kwargs):
+        options = dict(kwargs.pop("execution_options", {}), prebuffer_rows=True)
+        return self.sync_session.execute(statement, params, execution_options=options, **kwargs)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self._execute, statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        result = await self.execute(statement, params, **kwargs)
+        return result.scalars()
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    @property
+    def new(self):
+        return self.sync_session.new
+
+    @property
+    def dirty(self):
+        return self.sync_session.dirty
+
+    @property
+    def deleted(self):
+        return self.sync_session.deleted
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance):
+        await run_in_threadpool(self.sync_session.refresh, instance)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+
+def open_session():
+    """Session pour les endpoints `async def` : AsyncSession en mode DB_ASYNC,
+    sinon une Session synchrone exécutée dans le pool de threads."""
+    if settings.DB_ASYNC:
+        return AsyncSessionLocal()
+    # expire_on_commit=False : lire un attribut après commit ne doit pas
+    # relancer de requête depuis la boucle d'événements
+    return ThreadedSession(SessionLocal(expire_on_commit=False))
+
+
+class LazySession:
+    """Session ouverte au premier usage.
+
+    Une requête qui s'arrête avant tout accès à la base (validation, 404 sur
+    un paramètre, jeton refusé…) ne crée ni session ni connexion.
+    """
+
+    def __init__(self):
+        self._session = None
+
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name):
+        if self._session is None:
+            self._session = open_session()
+        return getattr(self._session, name)
+
+
+async def get_db():
+    """Dépendance de session commune à tous les routers.
+
+    Valide en fin de requête ce qui n'a pas été commité explicitement,
+    annule sur exception, et comptabilise les requêtes SQL exécutées.
+    """
+    db = LazySession()
+    stats = RequestDbStats()
+    current_request_stats.set(stats)
     try:
         yield db
+        if db.opened and (stats.writes_pending or db.new or db.dirty or db.deleted):
+            await db.commit()
+    except Exception:
+        if db.opened:
+            await db.rollback()
+        raise
+    finally:
+        if db.opened:
+            await db.close()
+        current_request_stats.set(None)
+        request_db_metrics.record(stats, db.opened)
+        logger.debug("%d requête(s) SQL, %.1f ms", stats.statements, stats.duration * 1000)
+
+
+async def run_with_session(fn, *args):
+    """Exécute `await fn(db, *args)` dans une session à part, hors de toute
+    requête (tâches partagées par plusieurs requêtes, flux)."""
+    db = open_session()
+    try:
+        return await fn(db, *args)
     finally:
-        db.close()
+        await db.close()
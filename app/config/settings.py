@@ -1,14 +1,67 @@
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
+    # "development" active notamment le journal SQL
+    ENVIRONMENT: str = "production"
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # Nombre de jetons déjà vérifiés gardés en mémoire par worker
+    TOKEN_CACHE_SIZE: int = 4096
+
+    # Hachage des mots de passe : coût bcrypt et pool de processus dédié
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
 
     DB_USER: str
     DB_PASSWORD: str
     DB_HOST: str
     DB_PORT: int
     DB_NAME: str
+    # Pool de connexions, par worker : pool_size + max_overflow connexions au
+    # plus, à comparer au max_connections de MySQL multiplié par les workers
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    # Recycler avant le wait_timeout de MySQL (8 h par défaut) et les coupures proxy
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Journal SQL : par défaut seulement en développement
+    DB_ECHO: Optional[bool] = None
+    # URL SQLAlchemy complète (prend le pas sur DB_*), ex. sqlite:///test.db
+    DATABASE_URL: Optional[str] = None
+    # Mode asynchrone : moteur aiomysql et sessions AsyncSession dans les
+    # endpoints ; désactivé, les mêmes endpoints passent par le pool de threads
+    DB_ASYNC: bool = False
+    # URL du moteur asynchrone, ex. sqlite+aiosqlite:///test.db pour les tests
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Cache en mémoire des lectures fréquentes (liste des secteurs, détail
+    # d'une norme) ; 0 entrée le désactive. La version en base est relue au
+    # plus toutes les CACHE_VERSION_CHECK_SECONDS : c'est le délai maximal
+    # avant qu'un worker voie l'écriture faite par un autre
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_TTL_SECONDS: float = 300
+    CACHE_VERSION_CHECK_SECONDS: float = 1.0
+
+    # Journal des modifications (GET /normes/changes) : une écriture n'y est
+    # servie qu'après ce délai, le temps que les transactions concurrentes
+    # plus anciennes soient commitées
+    CHANGES_SETTLE_SECONDS: float = 5.0
+
+    # Taille maximale d'un PDF de norme
+    MAX_PDF_SIZE_MB: int = 50
+    # Taille maximale d'un envoi POST /normes/import (manifeste + archive ZIP)
+    MAX_IMPORT_SIZE_MB: int = 2048
+    # Cache HTTP des PDF : privé (routes authentifiées), revalidé par ETag
+    PDF_CACHE_CONTROL: str = "private, no-cache"
+    # Envoi des PDF : "direct" (FileResponse) ou délégué au proxy frontal,
+    # qui lit le fichier lui-même ("x-accel-redirect" pour nginx,
+    # "x-sendfile" pour Apache / lighttpd)
+    PDF_DELIVERY: Literal["direct", "x-accel-redirect", "x-sendfile"] = "direct"
+    # Location nginx `internal` qui pointe vers uploads/pdf
+    PDF_ACCEL_REDIRECT_PREFIX: str = "/protected/pdf/"
 
     class Config:
         env_file = ".env"
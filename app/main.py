@@ -1,45 +1,49 @@
-from fastapi import FastAPI, Request
-from app.config import Base, engine
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from app.config import Base, engine, settings
+from app.config.database import async_engine
 from app.api import (
     users_router,
     admins_router,
     clients_router,
     secteurs_router,
     normes_router,
-    login_router
+    login_router,
+    internal_router
 )
-from app.utils.response import success_response, error_response
-from app.utils.auth import decode_access_token
+from app.utils.middleware import AuthMiddleware, UploadSizeLimitMiddleware
+from app.utils.storage import MAX_PDF_SIZE
+from app.utils.bulk_import import MAX_IMPORT_SIZE
+from app.utils.passwords import password_hasher
 
 # Création des tables
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Gestion des Normes à Madagascar")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Arrêter les processus de hachage avec le worker
+    password_hasher.shutdown()
+    # Fermer proprement les connexions du pool asynchrone
+    if async_engine is not None:
+        await async_engine.dispose()
 
-@app.middleware("http")
-async def auth_middleware(request: Request, call_next):
-    # Routes exemptées du token
-    exempt_paths = ["/auth/login", "/admins"]  # ajouter toutes les routes à exempter
-    if any(request.url.path.startswith(path) for path in exempt_paths):
-        return await call_next(request)
+app = FastAPI(title="Gestion des Normes à Madagascar", lifespan=lifespan)
 
-    token = request.headers.get("Authorization")
-    if not token:
-        return error_response(
-            message="Vous devez être connecté pour accéder à cette ressource.",
-            status_code=401
-        )
-    
-    token = token.replace("Bearer ", "")
-    payload = decode_access_token(token)
-    if not payload:
-        return error_response(
-            message="Votre session a expiré, veuillez vous reconnecter.",
-            status_code=401
-        )
+# Marge pour les autres champs du formulaire multipart
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_body_size=MAX_PDF_SIZE + 64 * 1024,
+    path_limits={"/normes/import": MAX_IMPORT_SIZE}
+)
+
+# Routes exemptées du token : ajouter toutes les routes à exempter
+app.add_middleware(
+    AuthMiddleware,
+    exempt_paths=["/auth/login", "/admins"],
+    cache_size=settings.TOKEN_CACHE_SIZE
+)
 
-    response = await call_next(request)
-    return response
 # Inclure les routes
 app.include_router(users_router)
 app.include_router(admins_router)
@@ -47,3 +51,4 @@ app.include_router(clients_router)
 app.include_router(secteurs_router)
 app.include_router(normes_router)
 app.include_router(login_router)
+app.include_router(internal_router)
@@ -3,5 +3,9 @@ from .admin import Admin
 from .client import Client
 from .secteur import Secteur
 from .norme import Norme
+from .norme_texte import NormeTexte
+from .cache_version import CacheVersion
+from .catalogue_change import CatalogueChange
+from .secteur_stats import SecteurStats
 from .base import Base
 
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, BigInteger
+from .base import Base
+
+class CacheVersion(Base):
+    """Compteur de version d'un ensemble de données mis en cache.
+
+    Incrémenté dans la transaction de chaque écriture : les workers comparent
+    la valeur lue à celle de leur cache pour savoir s'il est périmé.
+    """
+    __tablename__ = "cache_versions"
+
+    nom = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
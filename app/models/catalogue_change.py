@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from .base import Base
+
+class CatalogueChange(Base):
+    """Journal des écritures sur les normes et les secteurs.
+
+    Une ligne par insertion, modification ou suppression, dans la transaction
+    de l'écriture : l'id auto-incrémenté sert de curseur à GET /normes/changes,
+    les lignes "delete" de pierres tombales.
+    """
+    __tablename__ = "catalogue_changes"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    # "normes" ou "secteurs"
+    entite = Column(String(20), nullable=False)
+    objet_id = Column(Integer, nullable=False)
+    # "insert", "update" ou "delete"
+    operation = Column(String(10), nullable=False)
+    modifie_le = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -1,9 +1,7 @@
 # app/models/client.py
 from sqlalchemy import Column, Integer, String
 from .base import Base
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.utils.passwords import pwd_context
 
 class Client(Base):
     __tablename__ = "clients"
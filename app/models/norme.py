@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from .base import Base
 
@@ -10,8 +11,23 @@ class Norme(Base):
     nom = Column(String(200), nullable=False)
     date_creation = Column(Date, nullable=False)
 
-    # chemin du fichier PDF
+    # chemin du fichier PDF (stockage adressé par contenu, cf. app/utils/storage.py)
     fichier_pdf = Column(String(255), nullable=False)
+    fichier_sha256 = Column(String(64), index=True, nullable=True)
+    fichier_taille = Column(BigInteger, nullable=True)
+    # date (UTC) du dépôt du PDF actuel, pour Last-Modified
+    fichier_modifie_le = Column(DateTime, nullable=True)
+    # date (UTC) de la dernière écriture sur la norme
+    modifie_le = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, server_default=func.now())
 
     secteur_id = Column(Integer, ForeignKey("secteurs.id"), nullable=False)
     secteur = relationship("Secteur", back_populates="normes")
+
+    __table_args__ = (
+        # "normes du secteur X entre deux dates", triées par date
+        Index("ix_normes_secteur_id_date_creation", "secteur_id", "date_creation"),
+        # tri / pagination par date sur tout le catalogue
+        Index("ix_normes_date_creation_id", "date_creation", "id"),
+        # recherche plein texte (GET /normes/search), MySQL uniquement
+        Index("ix_normes_fulltext_nom_codification", "nom", "codification", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
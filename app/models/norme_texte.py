@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, Text, ForeignKey, Index
+from sqlalchemy.dialects import mysql
+from .base import Base
+
+class NormeTexte(Base):
+    """Texte extrait du PDF d'une norme, indexé pour la recherche."""
+    __tablename__ = "normes_textes"
+
+    norme_id = Column(Integer, ForeignKey("normes.id", ondelete="CASCADE"), primary_key=True)
+    contenu = Column(Text().with_variant(mysql.LONGTEXT(), "mysql"), nullable=False)
+
+    __table_args__ = (
+        Index("ix_normes_textes_fulltext_contenu", "contenu", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
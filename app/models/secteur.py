@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, func
 from sqlalchemy.orm import relationship
 from .base import Base
 
@@ -7,6 +8,8 @@ class Secteur(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     nom = Column(String(100), unique=True, nullable=False)
+    # date (UTC) de la dernière écriture sur le secteur
+    modifie_le = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, server_default=func.now())
 
     # Relation 1-n avec Norme
     normes = relationship("Norme", back_populates="secteur")
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey
+from .base import Base
+
+class SecteurStats(Base):
+    """Agrégats des normes d'un secteur, tenus à jour à chaque écriture sur
+    les normes par incréments (cf. app/utils/secteur_stats.py). Une ligne par
+    secteur, créée avec lui.
+    """
+    __tablename__ = "secteurs_stats"
+
+    secteur_id = Column(Integer, ForeignKey("secteurs.id", ondelete="CASCADE"), primary_key=True)
+    nb_normes = Column(Integer, nullable=False, default=0)
+    derniere_date_creation = Column(Date, nullable=True)
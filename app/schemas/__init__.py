@@ -1,5 +1,6 @@
-from .user import UserCreate, UserResponse 
-from .admin import AdminCreate ,AdminResponse
-from .client import ClientCreate ,ClientResponse
-from .secteur import SecteurCreate ,SecteurResponse
-from .norme import NormeCreate ,NormeResponse
\ No newline at end of file
+from .user import UserCreate, UserResponse, UserData
+from .admin import AdminCreate, AdminResponse, AdminData
+from .client import ClientCreate, ClientResponse, ClientData
+from .secteur import SecteurCreate, SecteurResponse, SecteurData, SecteurStatsData
+from .norme import NormeCreate, NormeResponse, NormeData, NormeSearchData, NormeImportData, NormeBatchGet, NormeBatchData, NormeBulkUpdate, NormeBulkDelete, NormeBulkData, NormeFacetsData
+from .catalogue import CatalogueChangeData, CatalogueChangesData
@@ -1,5 +1,6 @@
 # app/schemas/admin.py
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
+from typing_extensions import TypedDict
 
 class AdminCreate(BaseModel):
     username: str
@@ -11,5 +12,10 @@ class AdminResponse(BaseModel):
     username: str
     email: EmailStr
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+# Élément de `data` des réponses admin (sérialisé par TypeAdapter)
+class AdminData(TypedDict):
+    id: int
+    username: str
+    email: str
@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Optional, Union
+from typing_extensions import TypedDict
+from app.schemas.norme import NormeData
+from app.schemas.secteur import SecteurData
+
+# Élément du flux GET /normes/changes : `data` est l'état actuel de l'objet,
+# None pour une suppression
+class CatalogueChangeData(TypedDict):
+    entite: str
+    id: int
+    operation: str
+    modifie_le: datetime
+    data: Optional[Union[NormeData, SecteurData]]
+
+class CatalogueChangesData(TypedDict):
+    changes: list[CatalogueChangeData]
+    # à repasser en `since` à l'appel suivant
+    cursor: Optional[str]
+    has_more: bool
@@ -1,5 +1,6 @@
 # app/schemas/client.py
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
+from typing_extensions import TypedDict
 
 class ClientCreate(BaseModel):
     username: str
@@ -11,5 +12,10 @@ class ClientResponse(BaseModel):
     username: str
     email: EmailStr
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+# Élément de `data` des réponses client (sérialisé par TypeAdapter)
+class ClientData(TypedDict):
+    id: int
+    username: str
+    email: str
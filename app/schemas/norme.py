@@ -1,5 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import date
+from typing import Optional
+from typing_extensions import TypedDict
+from app.utils.pagination import MAX_LIMIT
 
 class NormeBase(BaseModel):
     codification: str
@@ -15,5 +18,80 @@ class NormeResponse(NormeBase):
     id: int
     secteur: dict  # juste un dict avec id et nom du secteur
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+# Corps de POST /normes/batch-get
+class NormeBatchGet(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=MAX_LIMIT)
+
+# Corps de POST /normes/bulk-update et /normes/bulk-delete
+BULK_MAX_IDS = 5000
+
+class NormeBulkDelete(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=BULK_MAX_IDS)
+
+class NormeBulkUpdate(NormeBulkDelete):
+    # Champs appliqués à toutes les normes (la codification, unique, n'en fait pas partie)
+    nom: Optional[str] = None
+    date_creation: Optional[date] = None
+    secteur_id: Optional[int] = None
+
+# Éléments de `data` des réponses norme (sérialisés par TypeAdapter) : les
+# dates restent des objets date, converties en ISO 8601 à la sérialisation
+class NormeSecteurData(TypedDict):
+    id: int
+    nom: str
+
+class NormeData(TypedDict):
+    id: int
+    codification: str
+    nom: str
+    date_creation: Optional[date]
+    fichier_pdf: str
+    secteur: Optional[NormeSecteurData]
+
+class NormeSearchData(NormeData):
+    score: float
+
+class NormeBulkData(TypedDict):
+    # ids modifiés ou supprimés
+    ids: list[int]
+    manquants: list[int]
+
+class NormeBatchData(TypedDict):
+    normes: list[NormeData]
+    # ids demandés sans norme correspondante
+    manquants: list[int]
+
+# Rapport de POST /normes/import
+class NormeImportLigneData(TypedDict):
+    ligne: int
+    id: int
+    codification: str
+    fichier_pdf: str
+
+class NormeImportErreurData(TypedDict):
+    ligne: int
+    codification: Optional[str]
+    message: str
+
+class NormeImportData(TypedDict):
+    total: int
+    importees: int
+    normes: list[NormeImportLigneData]
+    erreurs: list[NormeImportErreurData]
+
+# Réponse de GET /normes/facets
+class NormeFacetSecteurData(TypedDict):
+    id: int
+    nom: str
+    nb_normes: int
+
+class NormeFacetAnneeData(TypedDict):
+    annee: int
+    nb_normes: int
+
+class NormeFacetsData(TypedDict):
+    total: int
+    secteurs: list[NormeFacetSecteurData]
+    annees: list[NormeFacetAnneeData]
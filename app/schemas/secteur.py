@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, ConfigDict
+from datetime import date
+from typing import List, Optional
+from typing_extensions import TypedDict
 from app.schemas.norme import NormeResponse
 
 class SecteurBase(BaseModel):
@@ -12,5 +14,14 @@ class SecteurResponse(SecteurBase):
     id: int
     normes: List[NormeResponse] = []
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+# Élément de `data` des réponses secteur (sérialisé par TypeAdapter)
+class SecteurData(TypedDict):
+    id: int
+    nom: str
+
+# GET /secteurs/?with_stats=true
+class SecteurStatsData(SecteurData):
+    nb_normes: int
+    derniere_date_creation: Optional[date]
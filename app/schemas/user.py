@@ -1,4 +1,5 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
+from typing_extensions import TypedDict
 
 class UserBase(BaseModel):
     name: str
@@ -10,5 +11,10 @@ class UserCreate(UserBase):
 class UserResponse(UserBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+# Élément de `data` des réponses user (sérialisé par TypeAdapter)
+class UserData(TypedDict):
+    id: int
+    name: str
+    email: str
@@ -1,10 +1,11 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import time
 import jwt
 from app.config.settings import settings
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.utils.passwords import pwd_context
 
 # --------- Hashing password ---------
 def hash_password(password: str) -> str:
@@ -32,3 +33,51 @@ def decode_access_token(token: str):
         return None
     except jwt.PyJWTError:
         return None
+
+# --------- Cache des jetons vérifiés ---------
+class VerifiedTokenCache:
+    """LRU borné des jetons dont la signature a déjà été vérifiée.
+
+    Clé : empreinte SHA-256 du jeton (le jeton lui-même n'est pas conservé).
+    Une entrée expire à l'instant `exp` du jeton, comme le ferait
+    decode_access_token. Utilisé depuis la boucle d'événements uniquement.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str):
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def put(self, token: str, payload: dict):
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+        key = self._key(token)
+        self._entries[key] = (payload, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+def verify_token_cached(token: str, cache: VerifiedTokenCache):
+    payload = cache.get(token)
+    if payload is None:
+        payload = decode_access_token(token)
+        if payload:
+            cache.put(token, payload)
+    return payload
@@ -0,0 +1,315 @@
+# app/utils/bulk_import.py
+"""Import en masse de normes : un manifeste CSV et une archive ZIP des PDF.
+
+Le manifeste a une ligne d'en-tête avec les colonnes codification, nom,
+date_creation (AAAA-MM-JJ), secteur_id et fichier (chemin du PDF dans
+l'archive), séparées par des virgules ou des points-virgules.
+
+Les lignes invalides (champ manquant, secteur inconnu, codification déjà
+prise, PDF absent ou trop volumineux) sont signalées une à une sans
+interrompre l'import ; les autres sont insérées dans une seule transaction.
+
+    python -m app.utils.bulk_import manifeste.csv archive.zip
+"""
+import csv
+import zipfile
+from datetime import datetime
+from pathlib import PurePosixPath
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from app.config.settings import settings
+from app.models.norme import Norme
+from app.models.secteur import Secteur
+from app.utils.cache import bump_version, invalidate
+from app.utils.changes import record_changes
+from app.utils.secteur_stats import lock_secteur_stats, apply_secteur_stats
+from app.utils.search import normes_index, norme_search_text
+from app.utils.storage import blob_path, receive_file, store_blob, FichierTropVolumineux, MAX_PDF_SIZE
+
+MANIFESTE_COLONNES = ("codification", "nom", "date_creation", "secteur_id", "fichier")
+MAX_MANIFESTE_SIZE = 10 * 1024 * 1024
+MAX_IMPORT_SIZE = settings.MAX_IMPORT_SIZE_MB * 1024 * 1024
+# Lignes par INSERT (executemany)
+INSERT_BATCH_SIZE = 500
+
+
+class ManifesteInvalide(ValueError):
+    pass
+
+
+class ArchiveInvalide(ValueError):
+    pass
+
+
+def _erreur(row: dict, message: str) -> dict:
+    return {"ligne": row["ligne"], "codification": row.get("codification") or None, "message": message}
+
+
+def read_manifest(content: bytes):
+    """Lit le manifeste. Retourne (lignes valides, erreurs)."""
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ManifesteInvalide("Le manifeste doit être encodé en UTF-8")
+    lines = text.splitlines()
+    if not lines:
+        raise ManifesteInvalide("Le manifeste est vide")
+    delimiter = ";" if lines[0].count(";") > lines[0].count(",") else ","
+    reader = csv.DictReader(lines, delimiter=delimiter)
+    fieldnames = [name.strip() for name in reader.fieldnames or []]
+    missing = [name for name in MANIFESTE_COLONNES if name not in fieldnames]
+    if missing:
+        raise ManifesteInvalide(f"Colonnes manquantes dans le manifeste : {', '.join(missing)}")
+    reader.fieldnames = fieldnames
+
+    rows, erreurs = [], []
+    seen = {}
+    # Ligne 1 : en-tête
+    for numero, record in enumerate(reader, start=2):
+        row = {"ligne": numero}
+        row.update({name: (record.get(name) or "").strip() for name in MANIFESTE_COLONNES})
+        empty = [name for name in MANIFESTE_COLONNES if not row[name]]
+        if empty:
+            erreurs.append(_erreur(row, f"Champ '{empty[0]}' manquant"))
+            continue
+        try:
+            row["date_creation"] = datetime.strptime(row["date_creation"], "%Y-%m-%d").date()
+        except ValueError:
+            erreurs.append(_erreur(row, "Date invalide (format attendu : AAAA-MM-JJ)"))
+            continue
+        if not row["secteur_id"].isdigit():
+            erreurs.append(_erreur(row, "secteur_id invalide"))
+            continue
+        row["secteur_id"] = int(row["secteur_id"])
+        if not row["fichier"].lower().endswith(".pdf"):
+            erreurs.append(_erreur(row, "Le fichier doit être un PDF"))
+            continue
+        if row["codification"] in seen:
+            erreurs.append(_erreur(row, f"Codification en double dans le manifeste (ligne {seen[row['codification']]})"))
+            continue
+        seen[row["codification"]] = numero
+        rows.append(row)
+    return rows, erreurs
+
+
+def extract_pdfs(archive, rows: list):
+    """Copie les PDF des lignes depuis l'archive vers des fichiers
+    temporaires, un membre à la fois (SHA-256 calculé au passage).
+
+    Bloquant : via run_in_threadpool. Les chemins du manifeste sont cherchés
+    tels quels dans l'archive, puis par nom de fichier s'il est unique.
+    Retourne (lignes avec tmp_path / taille / sha256, erreurs).
+    """
+    try:
+        zf = zipfile.ZipFile(archive)
+    except (zipfile.BadZipFile, OSError):
+        raise ArchiveInvalide("L'archive doit être un fichier ZIP valide")
+
+    extracted, erreurs = [], []
+    # Un même PDF cité par plusieurs lignes n'est copié qu'une fois
+    copies = {}
+    try:
+        members = {info.filename: info for info in zf.infolist() if not info.is_dir()}
+        by_name = {}
+        for info in members.values():
+            by_name.setdefault(PurePosixPath(info.filename).name, []).append(info)
+
+        for row in rows:
+            fichier = row["fichier"].replace("\\", "/").lstrip("/")
+            info = members.get(fichier)
+            if info is None and len(by_name.get(PurePosixPath(fichier).name, ())) == 1:
+                info = by_name[PurePosixPath(fichier).name][0]
+            if info is None:
+                erreurs.append(_erreur(row, f"Fichier '{row['fichier']}' absent de l'archive"))
+                continue
+            if info.filename not in copies:
+                if info.file_size > MAX_PDF_SIZE:
+                    copies[info.filename] = FichierTropVolumineux(info.filename)
+                else:
+                    try:
+                        with zf.open(info) as source:
+                            copies[info.filename] = receive_file(source, info.filename)
+                    except FichierTropVolumineux as e:
+                        copies[info.filename] = e
+                    except (zipfile.BadZipFile, OSError, EOFError) as e:
+                        copies[info.filename] = e
+            copy = copies[info.filename]
+            if isinstance(copy, FichierTropVolumineux):
+                erreurs.append(_erreur(row, "Le fichier dépasse la taille maximale autorisée"))
+                continue
+            if isinstance(copy, Exception):
+                erreurs.append(_erreur(row, f"Fichier '{row['fichier']}' illisible dans l'archive"))
+                continue
+            row["tmp_path"], row["taille"], row["sha256"] = copy
+            extracted.append(row)
+    except BaseException:
+        discard_tmp_files(extracted)
+        for copy in copies.values():
+            if isinstance(copy, tuple):
+                copy[0].unlink(missing_ok=True)
+        raise
+    finally:
+        zf.close()
+    return extracted, erreurs
+
+
+def discard_tmp_files(rows: list):
+    for row in rows:
+        row["tmp_path"].unlink(missing_ok=True)
+
+
+async def _insert_rows(db, rows: list):
+    """INSERT par lots (executemany), puis relecture des ids par codification.
+    Retourne {codification: id}."""
+    now = datetime.utcnow()
+    ids = {}
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        batch = rows[start:start + INSERT_BATCH_SIZE]
+        await db.execute(insert(Norme), [
+            {
+                "codification": row["codification"],
+                "nom": row["nom"],
+                "date_creation": row["date_creation"],
+                "secteur_id": row["secteur_id"],
+                "fichier_pdf": str(blob_path(row["sha256"])),
+                "fichier_sha256": row["sha256"],
+                "fichier_taille": row["taille"],
+                "fichier_modifie_le": now,
+                "modifie_le": now,
+            }
+            for row in batch
+        ])
+        # Pas de RETURNING sous MySQL : les ids sont relus par la clé unique
+        result = await db.execute(
+            select(Norme.id, Norme.codification)
+            .where(Norme.codification.in_([row["codification"] for row in batch]))
+        )
+        ids.update({r.codification: r.id for r in result})
+        await record_changes(db, "normes", [ids[row["codification"]] for row in batch], "insert")
+    return ids
+
+
+async def import_normes(db, manifest: bytes, archive) -> dict:
+    """Importe les lignes valides du manifeste dans une seule transaction.
+
+    `archive` est un fichier binaire ouvert et positionnable (ZIP). Les
+    secteurs et les codifications existantes sont vérifiés en une requête
+    chacun, avant toute copie de fichier. Retourne le rapport d'import.
+    """
+    rows, erreurs = read_manifest(manifest)
+    total = len(rows) + len(erreurs)
+
+    secteur_ids = {row["secteur_id"] for row in rows}
+    known = set((await db.scalars(select(Secteur.id).where(Secteur.id.in_(secteur_ids)))).all()) if secteur_ids else set()
+    codifications = [row["codification"] for row in rows]
+    taken = set((await db.scalars(
+        select(Norme.codification).where(Norme.codification.in_(codifications))
+    )).all()) if codifications else set()
+
+    valid = []
+    for row in rows:
+        if row["secteur_id"] not in known:
+            erreurs.append(_erreur(row, "Secteur non trouvé"))
+        elif row["codification"] in taken:
+            erreurs.append(_erreur(row, f"La codification '{row['codification']}' existe déjà"))
+        else:
+            valid.append(row)
+
+    rows, file_erreurs = await run_in_threadpool(extract_pdfs, archive, valid)
+    erreurs.extend(file_erreurs)
+
+    dropped = []
+    try:
+        # Une norme créée entre la vérification et l'insertion fait échouer le
+        # lot entier : on écarte les codifications prises et on recommence une fois
+        for attempt in range(2):
+            try:
+                stats = await lock_secteur_stats(db, {row["secteur_id"] for row in rows})
+                ids = await _insert_rows(db, rows) if rows else {}
+                if rows:
+                    await apply_secteur_stats(db, stats, added=[(row["secteur_id"], row["date_creation"]) for row in rows])
+                    await bump_version(db, "normes")
+                await db.commit()
+                break
+            except IntegrityError:
+                await db.rollback()
+                if attempt:
+                    raise
+                taken = set((await db.scalars(
+                    select(Norme.codification).where(Norme.codification.in_([row["codification"] for row in rows]))
+                )).all())
+                remaining = []
+                for row in rows:
+                    if row["codification"] in taken:
+                        erreurs.append(_erreur(row, f"La codification '{row['codification']}' existe déjà"))
+                        dropped.append(row)
+                    else:
+                        remaining.append(row)
+                rows = remaining
+    except BaseException:
+        await run_in_threadpool(discard_tmp_files, rows + dropped)
+        raise
+    # Fichiers des lignes écartées, sauf s'ils servent aussi à une ligne importée
+    used = {row["tmp_path"] for row in rows}
+    await run_in_threadpool(discard_tmp_files, [row for row in dropped if row["tmp_path"] not in used])
+
+    if rows:
+        invalidate("normes")
+    # Les fichiers ne sont rangés qu'une fois les références commitées
+    for row in rows:
+        await store_blob(row["tmp_path"], row["sha256"])
+        normes_index.add(ids[row["codification"]], norme_search_text(row["nom"], row["codification"]))
+
+    erreurs.sort(key=lambda erreur: erreur["ligne"])
+    return {
+        "total": total,
+        "importees": len(rows),
+        "normes": [
+            {
+                "ligne": row["ligne"],
+                "id": ids[row["codification"]],
+                "codification": row["codification"],
+                "fichier_pdf": str(blob_path(row["sha256"])),
+            }
+            for row in rows
+        ],
+        "erreurs": erreurs,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    from app.config.database import async_engine, run_with_session
+    from app.utils.pdf_text import index_norme_pdf
+
+    parser = argparse.ArgumentParser(description="Import en masse de normes (manifeste CSV + archive ZIP des PDF)")
+    parser.add_argument("manifeste", help="manifeste CSV")
+    parser.add_argument("archive", help="archive ZIP des PDF")
+    parser.add_argument("--sans-texte", action="store_true", help="ne pas extraire le texte des PDF importés")
+    args = parser.parse_args()
+
+    async def main():
+        with open(args.manifeste, "rb") as manifeste:
+            content = manifeste.read(MAX_MANIFESTE_SIZE + 1)
+        if len(content) > MAX_MANIFESTE_SIZE:
+            raise ManifesteInvalide("Le manifeste dépasse la taille maximale autorisée")
+        try:
+            with open(args.archive, "rb") as archive:
+                return await run_with_session(import_normes, content, archive)
+        finally:
+            if async_engine is not None:
+                await async_engine.dispose()
+
+    try:
+        rapport = asyncio.run(main())
+    except (ManifesteInvalide, ArchiveInvalide) as e:
+        parser.exit(1, f"{e}\n")
+
+    for erreur in rapport["erreurs"]:
+        print(f"ligne {erreur['ligne']} ({erreur['codification'] or '-'}) : {erreur['message']}")
+    if not args.sans_texte:
+        for norme in rapport["normes"]:
+            index_norme_pdf(norme["id"], norme["fichier_pdf"])
+    print(f"{rapport['importees']} norme(s) importée(s) sur {rapport['total']}, {len(rapport['erreurs'])} erreur(s)")
@@ -0,0 +1,165 @@
+# app/utils/cache.py
+import time
+from collections import OrderedDict
+from sqlalchemy import select, update
+from app.config.settings import settings
+from app.models.cache_version import CacheVersion
+
+
+async def bump_version(db, nom: str):
+    """Incrémente la version de la table `nom` dans la transaction en cours.
+
+    À appeler avant le commit de chaque écriture, puis invalidate(nom) une
+    fois le commit fait : les autres workers verront la nouvelle version à
+    leur prochaine vérification.
+    """
+    result = await db.execute(
+        update(CacheVersion).where(CacheVersion.nom == nom).values(version=CacheVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.add(CacheVersion(nom=nom, version=1))
+
+
+def bump_version_sync(db, nom: str):
+    """bump_version pour une Session synchrone (tâches de fond, scripts)."""
+    result = db.execute(
+        update(CacheVersion).where(CacheVersion.nom == nom).values(version=CacheVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.add(CacheVersion(nom=nom, version=1))
+
+
+class VersionStamps:
+    """Versions des tables (cache_versions) connues de ce worker.
+
+    Toutes les versions sont relues en une requête, au plus une fois par
+    `check_interval`, ou au prochain accès après une écriture locale.
+    Utilisé depuis la boucle d'événements uniquement (pas de verrou).
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self.versions = {}
+        self._checked_at = None
+
+    async def get(self, db, *noms) -> tuple:
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            result = await db.execute(select(CacheVersion.nom, CacheVersion.version))
+            self.versions = {row.nom: row.version for row in result}
+            self._checked_at = now
+        return tuple(self.versions.get(nom, 0) for nom in noms)
+
+    def mark_stale(self):
+        self._checked_at = None
+
+
+version_stamps = VersionStamps(settings.CACHE_VERSION_CHECK_SECONDS)
+
+
+class VersionedCache:
+    """Cache LRU à durée de vie limitée, cohérent entre workers.
+
+    Chaque worker garde ses entrées en mémoire et les vide quand la version
+    de `nom` (VersionStamps) a changé. Utilisé depuis la boucle
+    d'événements uniquement (pas de verrou).
+    """
+
+    def __init__(self, nom: str, maxsize: int, ttl: float, stamps: VersionStamps):
+        self.nom = nom
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stamps = stamps
+        self.version = None
+        self.generation = 0
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _clear(self):
+        self._entries.clear()
+        # Un chargement commencé avant le vidage ne doit pas être stocké
+        self.generation += 1
+
+    async def _check_version(self, db):
+        version, = await self.stamps.get(db, self.nom)
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._clear()
+            self.version = version
+
+    async def get_or_load(self, db, key, loader):
+        """Retourne la valeur en cache pour `key`, ou celle de `await loader()`.
+
+        Un résultat None (introuvable) n'est pas mis en cache.
+        """
+        if self.maxsize <= 0:
+            return await loader()
+        await self._check_version(db)
+
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        generation = self.generation
+        value = await loader()
+        if value is not None and generation == self.generation:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self):
+        """Vide le cache local après une écriture commitée par ce worker."""
+        self.invalidations += 1
+        self._clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def _build(nom: str) -> VersionedCache:
+    return VersionedCache(
+        nom,
+        maxsize=settings.CACHE_MAX_ENTRIES,
+        ttl=settings.CACHE_TTL_SECONDS,
+        stamps=version_stamps,
+    )
+
+
+# Pages de GET /secteurs/
+secteurs_cache = _build("secteurs")
+# Détail de GET /normes/{id} (porte aussi le nom du secteur)
+normes_cache = _build("normes")
+
+CACHES = {cache.nom: cache for cache in (secteurs_cache, normes_cache)}
+
+
+def invalidate(*noms):
+    """Après le commit d'une écriture sur ces tables (versions incrémentées
+    par bump_version) : vide les caches locaux et force la relecture des
+    versions au prochain accès."""
+    for nom in noms:
+        if nom in CACHES:
+            CACHES[nom].invalidate()
+    version_stamps.mark_stale()
@@ -0,0 +1,69 @@
+# app/utils/changes.py
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, literal
+from app.config.settings import settings
+from app.models.catalogue_change import CatalogueChange
+from app.models.norme import Norme
+
+
+def record_change(db, entite: str, objet_id: int, operation: str):
+    """Ajoute une ligne au journal, dans la transaction de l'écriture."""
+    db.add(CatalogueChange(entite=entite, objet_id=objet_id, operation=operation))
+
+
+async def record_changes(db, entite: str, objet_ids, operation: str):
+    """record_change pour plusieurs objets, en un INSERT (executemany)."""
+    now = datetime.utcnow()
+    await db.execute(insert(CatalogueChange), [
+        {"entite": entite, "objet_id": objet_id, "operation": operation, "modifie_le": now}
+        for objet_id in objet_ids
+    ])
+
+
+async def record_secteur_normes(db, secteur_id: int):
+    """Le nom du secteur figure dans chaque norme : une ligne "update" par
+    norme du secteur, en une requête INSERT ... SELECT."""
+    await db.execute(insert(CatalogueChange).from_select(
+        ["entite", "objet_id", "operation", "modifie_le"],
+        select(literal("normes"), Norme.id, literal("update"), literal(datetime.utcnow()))
+        .where(Norme.secteur_id == secteur_id)
+    ))
+
+
+async def read_journal(db, since: int, limit: int):
+    """Lignes du journal après le curseur `since`, dans l'ordre des ids.
+
+    Les ids sont attribués à l'insertion mais visibles au commit : une
+    transaction plus lente peut encore publier un id inférieur au dernier
+    lu. On s'arrête donc à la première ligne de moins de
+    CHANGES_SETTLE_SECONDS, qui sera servie à l'appel suivant. Retourne
+    (lignes, has_more).
+    """
+    stmt = select(CatalogueChange).order_by(CatalogueChange.id).limit(limit + 1)
+    if since:
+        stmt = stmt.where(CatalogueChange.id > since)
+    changes = (await db.scalars(stmt)).all()
+
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.CHANGES_SETTLE_SECONDS)
+    for i, change in enumerate(changes):
+        if change.modifie_le > cutoff:
+            return changes[:i], False
+    if len(changes) > limit:
+        return changes[:limit], True
+    return changes, False
+
+
+def collapse_changes(changes) -> list:
+    """Une entrée par objet : sa dernière opération, à la place de sa
+    première ligne (un secteur reste avant les normes insérées après lui).
+    Une insertion suivie de modifications reste "insert". Retourne des
+    tuples (entite, objet_id, operation, modifie_le)."""
+    latest = {}
+    for change in changes:
+        key = (change.entite, change.objet_id)
+        previous = latest.get(key)
+        operation = change.operation
+        if previous is not None and previous[0] == "insert" and operation == "update":
+            operation = "insert"
+        latest[key] = (operation, change.modifie_le)
+    return [(entite, objet_id, operation, modifie_le) for (entite, objet_id), (operation, modifie_le) in latest.items()]
@@ -0,0 +1,208 @@
+# app/utils/db_metrics.py
+import threading
+import time
+from contextvars import ContextVar
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# Une attente de plus d'une milliseconde signifie que le pool était épuisé
+WAIT_THRESHOLD = 0.001
+
+
+class PoolMetrics:
+    """Statistiques d'un pool de connexions, alimentées par ses événements.
+
+    Les compteurs sont propres au worker : pour dimensionner le pool face au
+    max_connections de MySQL, multiplier max_connections_per_worker par le
+    nombre de workers.
+    """
+
+    def __init__(self, max_overflow: int):
+        self.max_overflow = max_overflow
+        self.pool = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.waited = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+
+    def attach(self, pool):
+        self.pool = pool
+        pool.metrics = self
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            if seconds > WAIT_THRESHOLD:
+                self.waited += 1
+                self.wait_total += seconds
+                self.wait_max = max(self.wait_max, seconds)
+
+    def stats(self) -> dict:
+        size = self.pool.size() if self.pool is not None else 0
+        with self._lock:
+            return {
+                "pool_size": size,
+                "max_overflow": self.max_overflow,
+                "max_connections_per_worker": size + self.max_overflow,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "overflow": max(0, self.checked_out - size),
+                "peak_overflow": max(0, self.peak_checked_out - size),
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "waited": self.waited,
+                "wait_total_ms": round(self.wait_total * 1000, 3),
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "timeouts": self.timeouts,
+            }
+
+
+class TimedPoolMixin:
+    """Mesure le temps passé à attendre une connexion libre.
+
+    Aucun événement SQLAlchemy ne précède l'obtention d'une connexion : on
+    chronomètre donc _do_get(), qui bloque tant que le pool est épuisé.
+    """
+
+    metrics = None
+
+    def _do_get(self):
+        if self.metrics is None:
+            return super()._do_get()
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out)
+
+    def recreate(self):
+        # engine.dispose() remplace le pool : les événements suivent, pas l'attribut
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = pool
+        return pool
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class RequestDbStats:
+    """Requêtes SQL exécutées pendant une requête HTTP."""
+
+    __slots__ = ("statements", "duration", "writes_pending")
+
+    def __init__(self):
+        self.statements = 0
+        self.duration = 0.0
+        # Une écriture a été envoyée depuis le dernier COMMIT
+        self.writes_pending = False
+
+
+# Statistiques de la requête HTTP en cours ; run_in_threadpool copie le
+# contexte, les requêtes exécutées dans le pool de threads y sont comptées
+current_request_stats = ContextVar("current_request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request_stats.get()
+    if stats is None or not conn.info.get("query_start"):
+        return
+    stats.duration += time.perf_counter() - conn.info["query_start"].pop()
+    stats.statements += 1
+    if context is not None and (context.isinsert or context.isupdate or context.isdelete):
+        stats.writes_pending = True
+
+
+def _on_commit(conn):
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.writes_pending = False
+
+
+def instrument_statements(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "commit", _on_commit)
+
+
+class RequestDbMetrics:
+    """Cumul des statistiques SQL par requête HTTP, pour /internal/metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.untouched = 0
+        self.statements = 0
+        self.duration = 0.0
+        self.max_statements = 0
+        self.max_duration = 0.0
+
+    def record(self, stats: RequestDbStats, opened: bool):
+        with self._lock:
+            self.requests += 1
+            if not opened:
+                self.untouched += 1
+            self.statements += stats.statements
+            self.duration += stats.duration
+            self.max_statements = max(self.max_statements, stats.statements)
+            self.max_duration = max(self.max_duration, stats.duration)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "without_session": self.untouched,
+                "statements": self.statements,
+                "db_time_ms": round(self.duration * 1000, 3),
+                "avg_statements": round(self.statements / self.requests, 2) if self.requests else 0,
+                "max_statements": self.max_statements,
+                "max_db_time_ms": round(self.max_duration * 1000, 3),
+            }
+
+
+request_db_metrics = RequestDbMetrics()
@@ -13,7 +13,10 @@ async def get_current_admin(request: Request, token: str = Depends(oauth2_scheme
     if not token:
         raise HTTPException(status_code=401, detail="Token manquant")
 
-    payload = decode_access_token(token)
+    # Jeton déjà vérifié par AuthMiddleware : pas de second décodage
+    payload = getattr(request.state, "token_payload", None)
+    if payload is None:
+        payload = decode_access_token(token)
     if payload is None:
         raise HTTPException(status_code=401, detail="Token invalide ou expiré")
 
@@ -0,0 +1,119 @@
+# app/utils/http_cache.py
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from secrets import token_hex
+import anyio
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+from app.utils.cache import version_stamps
+
+# Réponses JSON : gardées par le client mais revalidées à chaque fois (ETag)
+API_CACHE_CONTROL = "private, no-cache"
+
+
+def http_date(value: datetime) -> str:
+    # Les dates sont stockées en UTC naïf (datetime.utcnow)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value, usegmt=True)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # Comparaison faible (RFC 9110 §13.1.2) : W/"x" et "x" sont équivalents
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def is_not_modified(request: Request, etag: str = None, last_modified: datetime = None) -> bool:
+    """Vrai si la requête conditionnelle permet de répondre 304.
+
+    If-None-Match est prioritaire sur If-Modified-Since, qui n'est
+    consulté qu'en son absence.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        # Les dates HTTP sont à la seconde près
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+async def check_versions(request: Request, db, *noms):
+    """ETag d'une réponse dérivé des versions des tables qu'elle lit.
+
+    Retourne (etag, réponse 304 ou None) : le 304 part avant toute requête
+    sur les données et toute sérialisation. Les versions sont lues avant les
+    données, l'ETag ne peut donc pas annoncer un état plus récent que le
+    contenu qu'il accompagne.
+    """
+    versions = await version_stamps.get(db, *noms)
+    etag = 'W/"' + "-".join(f"{nom}.{version}" for nom, version in zip(noms, versions)) + '"'
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, etag):
+        return etag, Response(status_code=304, headers={"ETag": etag, "Cache-Control": API_CACHE_CONTROL})
+    return etag, None
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = API_CACHE_CONTROL
+    return response
+
+
+class RangeFileResponse(FileResponse):
+    """FileResponse dont les réponses multi-plages sont conformes (RFC 9110 §14.6).
+
+    Starlette 0.48 envoie `Content-Range: multipart/byteranges; …` au lieu de
+    `Content-Type`, sépare les parties par LF au lieu de CRLF et calcule un
+    Content-Length erroné, ce que les lecteurs PDF rejettent. Les plages
+    simples et If-Range restent gérés par FileResponse.
+    """
+
+    async def _handle_multiple_ranges(self, send, ranges, file_size, send_header_only):
+        boundary = token_hex(13)
+        content_type = self.headers["content-type"]
+        part_headers = [
+            (
+                f"--{boundary}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Range: bytes {start}-{end - 1}/{file_size}\r\n\r\n"
+            ).encode("latin-1")
+            for start, end in ranges
+        ]
+        closing = f"--{boundary}--\r\n".encode("latin-1")
+        content_length = sum(
+            len(header) + (end - start) + 2
+            for header, (start, end) in zip(part_headers, ranges)
+        ) + len(closing)
+
+        self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        self.headers["content-length"] = str(content_length)
+        await send({"type": "http.response.start", "status": 206, "headers": self.raw_headers})
+        if send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            for header, (start, end) in zip(part_headers, ranges):
+                await send({"type": "http.response.body", "body": header, "more_body": True})
+                await file.seek(start)
+                while start < end:
+                    chunk = await file.read(min(self.chunk_size, end - start))
+                    if not chunk:
+                        raise RuntimeError(f"Fichier {self.path} plus court que prévu")
+                    start += len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+            await send({"type": "http.response.body", "body": closing, "more_body": False})
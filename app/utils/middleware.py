@@ -0,0 +1,78 @@
+# app/utils/middleware.py
+from app.utils.auth import VerifiedTokenCache, verify_token_cached
+from app.utils.response import error_response
+
+
+class UploadSizeLimitMiddleware:
+    """Refuse (413) les envois dont le Content-Length dépasse la limite,
+    avant que le corps ne soit lu et mis en tampon par le parseur multipart.
+
+    Les corps sans Content-Length (chunked) restent bornés par receive_upload.
+    `path_limits` donne une autre limite à certains chemins (import en masse).
+    """
+
+    def __init__(self, app, max_body_size: int, methods=("POST", "PUT"), path_limits=None):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.methods = methods
+        self.path_limits = path_limits or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] in self.methods:
+            max_body_size = self.path_limits.get(scope["path"].rstrip("/"), self.max_body_size)
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > max_body_size:
+                        response = error_response(
+                            message="Le fichier dépasse la taille maximale autorisée",
+                            status_code=413
+                        )
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+
+class AuthMiddleware:
+    """Vérifie le jeton Bearer de chaque requête (middleware ASGI pur).
+
+    Chaque jeton n'est décodé qu'une fois : les jetons valides sont gardés
+    dans un LRU jusqu'à leur expiration, et les claims sont déposés dans
+    `request.state.token_payload` pour get_current_admin.
+    """
+
+    def __init__(self, app, exempt_paths=(), cache_size: int = 4096):
+        self.app = app
+        self.exempt_paths = tuple(exempt_paths)
+        self.cache = VerifiedTokenCache(cache_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                token = value.decode("latin-1")
+                break
+        if not token:
+            response = error_response(
+                message="Vous devez être connecté pour accéder à cette ressource.",
+                status_code=401
+            )
+            await response(scope, receive, send)
+            return
+
+        token = token.replace("Bearer ", "")
+        payload = verify_token_cached(token, self.cache)
+        if not payload:
+            response = error_response(
+                message="Votre session a expiré, veuillez vous reconnecter.",
+                status_code=401
+            )
+            await response(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})["token_payload"] = payload
+        await self.app(scope, receive, send)
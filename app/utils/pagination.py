@@ -0,0 +1,88 @@
+# app/utils/pagination.py
+import base64
+import json
+from datetime import date
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class CurseurInvalide(ValueError):
+    pass
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise CurseurInvalide(cursor)
+    if not isinstance(values, list):
+        raise CurseurInvalide(cursor)
+    return values
+
+
+def _dump_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _load_value(column, value):
+    python_type = column.type.python_type
+    try:
+        if issubclass(python_type, date) and isinstance(value, str):
+            return python_type.fromisoformat(value)
+    except ValueError:
+        raise CurseurInvalide(value)
+    if not isinstance(value, python_type) or isinstance(value, bool):
+        raise CurseurInvalide(value)
+    return value
+
+
+def _selects_entity(stmt) -> bool:
+    # select(Admin) -> objets Admin ; select(Admin.id, ...) -> lignes
+    descriptions = stmt.column_descriptions
+    return len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+
+
+async def paginate(db, stmt, keys, limit: int, after: str = None, descending: bool = False):
+    """Pagination par clé (keyset) sur une ou plusieurs colonnes.
+
+    `stmt` est un select() exécuté sur `db` (AsyncSession ou ThreadedSession).
+    `keys` est une colonne ou un tuple de colonnes dont la combinaison est
+    unique (terminer par la clé primaire). Le coût d'une page ne dépend pas de
+    sa position dans la table, contrairement à un OFFSET. Retourne
+    (lignes, next_cursor) ; next_cursor vaut None sur la dernière page.
+    """
+    if not isinstance(keys, (list, tuple)):
+        keys = (keys,)
+
+    if after is not None:
+        values = decode_cursor(after)
+        if len(values) != len(keys):
+            raise CurseurInvalide(after)
+        values = [_load_value(column, value) for column, value in zip(keys, values)]
+        # (k1, k2) > (v1, v2)  <=>  k1 > v1 OR (k1 = v1 AND k2 > v2)
+        clauses = []
+        for i, column in enumerate(keys):
+            equal = [keys[j] == values[j] for j in range(i)]
+            step = column < values[i] if descending else column > values[i]
+            clauses.append(and_(*equal, step))
+        stmt = stmt.where(or_(*clauses))
+
+    order = [column.desc() if descending else column.asc() for column in keys]
+    # On lit une ligne de plus pour savoir s'il reste une page
+    result = await db.execute(stmt.order_by(*order).limit(limit + 1))
+    rows = result.scalars().all() if _selects_entity(stmt) else result.all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([_dump_value(getattr(last, column.key)) for column in keys])
@@ -0,0 +1,27 @@
+# app/utils/password_worker.py
+# Fonctions exécutées dans les processus du pool de hachage : ce module
+# n'importe rien de l'application (ni settings, ni base de données) pour
+# que les processus fils démarrent vite et sans effet de bord.
+from functools import lru_cache
+from passlib.context import CryptContext
+
+
+@lru_cache(maxsize=None)
+def crypt_context(rounds: int) -> CryptContext:
+    # min = max = coût configuré : tout hash d'un autre coût est à recalculer
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(password)
+
+
+def verify_and_update(password: str, hashed_password: str, rounds: int):
+    """Retourne (valide, nouveau_hash) ; nouveau_hash est None si le hash est à jour."""
+    return crypt_context(rounds).verify_and_update(password, hashed_password)
@@ -0,0 +1,125 @@
+# app/utils/passwords.py
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.config.settings import settings
+from app.utils import password_worker
+
+# Contexte partagé pour les usages synchrones (Admin.set_password, scripts)
+pwd_context = password_worker.crypt_context(settings.BCRYPT_ROUNDS)
+
+
+class HachageSature(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Service unique de hachage / vérification bcrypt.
+
+    Les calculs tournent dans un pool de processus dédié, hors du pool de
+    threads d'anyio et sans tenir le GIL du worker. Au plus `max_workers`
+    calculs sont soumis à la fois ; les suivants attendent (file d'attente
+    mesurée) et au-delà de `max_queue` en attente, HachageSature est levée.
+    Un pool cassé (processus fils tué) est remplacé et le calcul relancé une
+    fois ; s'il échoue encore, HachageSature est levée.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, rounds: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._executor = None
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self.waiting = 0
+        self.running = 0
+        self.peak_waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.pool_restarts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn : les fils ne partagent ni threads ni connexions du parent
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        # Plusieurs calculs en cours voient la même panne : le pool n'est
+        # remplacé qu'une fois
+        if self._executor is executor:
+            executor.shutdown(wait=False)
+            self._executor = None
+            self.pool_restarts += 1
+
+    async def _submit(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                return await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                self._discard_executor(executor)
+                if attempt:
+                    raise HachageSature()
+
+    async def _run(self, fn, *args):
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise HachageSature()
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            return await self._submit(fn, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(password_worker.hash_password, password, self.rounds)
+
+    async def verify_and_update(self, password: str, hashed_password: str):
+        """Retourne (valide, nouveau_hash) : nouveau_hash est fourni quand le
+        coût configuré a changé depuis le calcul du hash stocké."""
+        valid, new_hash = await self._run(
+            password_worker.verify_and_update, password, hashed_password, self.rounds
+        )
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "rounds": self.rounds,
+            "running": self.running,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "pool_restarts": self.pool_restarts,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    rounds=settings.BCRYPT_ROUNDS
+)
@@ -0,0 +1,72 @@
+# app/utils/pdf_text.py
+import logging
+from pypdf import PdfReader
+from sqlalchemy import delete
+from app.config.database import SessionLocal
+from app.models.norme import Norme
+from app.models.norme_texte import NormeTexte
+from app.utils.search import contenus_index
+from app.utils.cache import bump_version_sync
+
+logger = logging.getLogger(__name__)
+
+
+def extract_pdf_text(path: str) -> str:
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def index_norme_pdf(norme_id: int, path: str):
+    """Extrait et indexe le texte du PDF d'une norme.
+
+    Lancée en tâche de fond après la réponse de create_norme / update_norme,
+    pour ne pas faire attendre l'upload.
+    """
+    try:
+        contenu = extract_pdf_text(path)
+    except Exception:
+        logger.exception("Extraction du texte impossible pour la norme %s (%s)", norme_id, path)
+        return
+
+    db = SessionLocal()
+    try:
+        # La norme a pu être supprimée, ou son PDF remplacé, pendant l'extraction
+        current = db.query(Norme.fichier_pdf).filter(Norme.id == norme_id).first()
+        if not current or current.fichier_pdf != path:
+            return
+        db.merge(NormeTexte(norme_id=norme_id, contenu=contenu))
+        # Les index de repli des autres workers se rechargent
+        bump_version_sync(db, "normes_textes")
+        db.commit()
+    finally:
+        db.close()
+    contenus_index.add(norme_id, contenu)
+
+
+async def drop_norme_text(db, norme_id: int):
+    await db.execute(delete(NormeTexte).where(NormeTexte.norme_id == norme_id))
+
+
+async def drop_normes_text(db, norme_ids):
+    await db.execute(delete(NormeTexte).where(NormeTexte.norme_id.in_(norme_ids)))
+
+
+def reindex_missing():
+    """Indexe les normes dont le texte n'a jamais été extrait (PDF antérieurs)."""
+    db = SessionLocal()
+    try:
+        missing = (
+            db.query(Norme.id, Norme.fichier_pdf)
+            .outerjoin(NormeTexte, NormeTexte.norme_id == Norme.id)
+            .filter(NormeTexte.norme_id.is_(None))
+            .all()
+        )
+    finally:
+        db.close()
+    for row in missing:
+        index_norme_pdf(row.id, row.fichier_pdf)
+    return len(missing)
+
+
+if __name__ == "__main__":
+    print(f"{reindex_missing()} norme(s) indexée(s)")
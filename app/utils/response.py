@@ -1,22 +1,72 @@
 # app/utils/response.py
-from fastapi.responses import JSONResponse
+from functools import lru_cache
+from typing import Any, Generic, Optional, TypeVar
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
 
-def success_response(data: dict = None, message: str = "Success", status_code: int = 200):
-    return JSONResponse(
+T = TypeVar("T")
+
+
+class Envelope(TypedDict, Generic[T]):
+    success: bool
+    message: str
+    data: Optional[T]
+
+
+class PageEnvelope(TypedDict, Generic[T]):
+    success: bool
+    message: str
+    data: list[T]
+    next_cursor: Optional[str]
+
+
+@lru_cache(maxsize=None)
+def envelope_adapter(schema=Any) -> TypeAdapter:
+    # Le sérialiseur pydantic-core est compilé une fois par schéma
+    return TypeAdapter(Envelope[schema])
+
+
+@lru_cache(maxsize=None)
+def page_adapter(schema=Any) -> TypeAdapter:
+    return TypeAdapter(PageEnvelope[schema])
+
+
+class EnvelopeResponse(Response):
+    """Corps JSON déjà sérialisé en bytes par un TypeAdapter."""
+    media_type = "application/json"
+
+
+# `schema` : type de `data` (ou d'un élément de la page), ex. NormeData.
+# Avec un schéma, la sérialisation suit ses champs sans inspecter les valeurs ;
+# sans schéma (Any), les types sont déterminés à la volée.
+def success_response(data: dict = None, message: str = "Success", status_code: int = 200, schema=Any):
+    return EnvelopeResponse(
         status_code=status_code,
-        content={
+        content=envelope_adapter(schema).dump_json({
             "success": True,
             "message": message,
             "data": data
-        }
+        })
     )
 
 def error_response(message: str = "Error", status_code: int = 400, data: dict = None):
-    return JSONResponse(
+    return EnvelopeResponse(
         status_code=status_code,
-        content={
+        content=envelope_adapter().dump_json({
             "success": False,
             "message": message,
             "data": data
-        }
+        })
+    )
+
+def paginated_response(data: list, next_cursor: str = None, message: str = "Success", status_code: int = 200, schema=Any):
+    return EnvelopeResponse(
+        status_code=status_code,
+        content=page_adapter(schema).dump_json({
+            "success": True,
+            "message": message,
+            "data": data,
+            "next_cursor": next_cursor
+        })
     )
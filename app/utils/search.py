@@ -0,0 +1,128 @@
+# app/utils/search.py
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Un terme qui n'est que le préfixe d'un mot indexé compte pour moitié
+PREFIX_WEIGHT = 0.5
+# Saturation de la fréquence d'un terme dans un document (comme BM25)
+TF_SATURATION = 1.2
+
+
+def tokenize(text: str) -> list:
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return TOKEN_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """Index inversé en mémoire : terme -> {document: fréquence}.
+
+    Sert de repli au FULLTEXT MySQL (SQLite, tests). Il est chargé
+    paresseusement au premier appel de search() puis maintenu par add() /
+    remove() ; tant qu'il n'est pas chargé, ces appels ne font rien.
+    `version` est celle des tables (cache_versions) lue avant le chargement :
+    l'index est rechargé quand elle change, écritures des autres workers
+    comprises.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.version = None
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._vocabulary = []
+
+    def load(self, documents, version=None):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._vocabulary = []
+            for doc_id, text in documents:
+                self._add(doc_id, text)
+            self.loaded = True
+            self.version = version
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._vocabulary = []
+            self.loaded = False
+            self.version = None
+
+    def add(self, doc_id, text: str):
+        with self._lock:
+            if not self.loaded:
+                return
+            self._remove(doc_id)
+            self._add(doc_id, text)
+
+    def remove(self, doc_id):
+        with self._lock:
+            if self.loaded:
+                self._remove(doc_id)
+
+    def _add(self, doc_id, text: str):
+        counts = defaultdict(int)
+        for token in tokenize(text):
+            counts[token] += 1
+        for token, count in counts.items():
+            if token not in self._postings:
+                insort(self._vocabulary, token)
+            self._postings[token][doc_id] = count
+        self._documents[doc_id] = tuple(counts)
+
+    def _remove(self, doc_id):
+        for token in self._documents.pop(doc_id, ()):
+            postings = self._postings[token]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary.pop(bisect_left(self._vocabulary, token))
+
+    def _expand(self, term: str):
+        # Mots du vocabulaire commençant par `term` (vocabulaire trié)
+        i = bisect_left(self._vocabulary, term)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(term):
+            yield self._vocabulary[i]
+            i += 1
+
+    def search(self, query: str) -> list:
+        """Retourne [(doc_id, score)] trié par pertinence décroissante."""
+        terms = set(tokenize(query))
+        with self._lock:
+            total = len(self._documents)
+            scores = defaultdict(float)
+            for term in terms:
+                for token in self._expand(term):
+                    postings = self._postings[token]
+                    idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                    weight = 1.0 if token == term else PREFIX_WEIGHT
+                    for doc_id, tf in postings.items():
+                        scores[doc_id] += weight * idf * tf * (TF_SATURATION + 1) / (tf + TF_SATURATION)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def boolean_query(query: str) -> str:
+    """Requête MATCH ... IN BOOLEAN MODE équivalente : chaque terme en préfixe."""
+    return " ".join(f"{token}*" for token in tokenize(query))
+
+
+# Index de repli des normes (nom + codification)
+normes_index = InvertedIndex()
+
+# Index de repli du texte extrait des PDF (table normes_textes)
+contenus_index = InvertedIndex()
+
+
+def norme_search_text(nom: str, codification: str) -> str:
+    return f"{nom or ''} {codification or ''}"
@@ -0,0 +1,107 @@
+# app/utils/secteur_stats.py
+from collections import defaultdict
+from sqlalchemy import select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models.norme import Norme
+from app.models.secteur_stats import SecteurStats
+
+# secteurs_stats est tenue à jour par incréments, dans la transaction de
+# l'écriture : aucune agrégation sur les normes d'un secteur.
+#
+# Ordre des verrous, le même pour tous les écrivains : les lignes
+# secteurs_stats (par secteur_id croissant), puis les normes. Deux écritures
+# sur un même secteur se suivent donc sans interblocage, et sans verrou de
+# plage sur l'index normes(secteur_id, ...).
+
+
+async def lock_secteur_stats(db, secteur_ids) -> dict:
+    """Verrouille (SELECT ... FOR UPDATE) les lignes secteurs_stats des
+    secteurs donnés. À appeler avant toute écriture sur leurs normes.
+
+    Retourne {secteur_id: derniere_date_creation}, None pour un secteur sans
+    ligne (elle sera créée par apply_secteur_stats).
+    """
+    secteur_ids = sorted({secteur_id for secteur_id in secteur_ids if secteur_id is not None})
+    if not secteur_ids:
+        return {}
+    result = await db.execute(
+        select(SecteurStats.secteur_id, SecteurStats.derniere_date_creation)
+        .where(SecteurStats.secteur_id.in_(secteur_ids))
+        .order_by(SecteurStats.secteur_id)
+        .with_for_update()
+    )
+    stats = dict.fromkeys(secteur_ids)
+    stats.update({row.secteur_id: row.derniere_date_creation for row in result})
+    return stats
+
+
+async def lock_normes(db, norme_ids, *columns, secteur_ids=()):
+    """Verrouille les lignes secteurs_stats des normes `norme_ids` (et des
+    `secteur_ids` de destination), puis ces normes.
+
+    Les normes sont relues après verrouillage (FOR UPDATE : dernière version
+    commitée). Retourne (stats, {id: ligne}), chaque ligne portant id,
+    secteur_id, date_creation et `columns`.
+    """
+    norme_ids = list(norme_ids)
+    secteurs = set((await db.scalars(
+        select(Norme.secteur_id).where(Norme.id.in_(norme_ids)).distinct()
+    )).all())
+    stats = await lock_secteur_stats(db, secteurs | set(secteur_ids))
+    result = await db.execute(
+        select(Norme.id, Norme.secteur_id, Norme.date_creation, *columns)
+        .where(Norme.id.in_(norme_ids))
+        .with_for_update()
+    )
+    rows = {row.id: row for row in result}
+    # Norme déplacée entre les deux lectures : son nouveau secteur est verrouillé à son tour
+    moved = {row.secteur_id for row in rows.values()} - stats.keys()
+    if moved:
+        stats.update(await lock_secteur_stats(db, moved))
+    return stats, rows
+
+
+def _upsert(dialect: str, secteur_id: int, delta: int, derniere):
+    values = {"secteur_id": secteur_id, "nb_normes": max(delta, 0), "derniere_date_creation": derniere}
+    changes = {"nb_normes": SecteurStats.nb_normes + delta, "derniere_date_creation": derniere}
+    if dialect == "mysql":
+        return mysql_insert(SecteurStats).values(**values).on_duplicate_key_update(**changes)
+    return sqlite_insert(SecteurStats).values(**values).on_conflict_do_update(
+        index_elements=[SecteurStats.secteur_id], set_=changes
+    )
+
+
+async def apply_secteur_stats(db, stats: dict, added=(), removed=()):
+    """Reporte dans secteurs_stats des normes ajoutées / retirées, données
+    par couples (secteur_id, date_creation). À appeler après les écritures
+    sur les normes, `stats` venant de lock_secteur_stats / lock_normes.
+
+    nb_normes est incrémenté (upsert nb_normes = nb_normes ± n). La dernière
+    date ne se relit en base que si une norme retirée la portait : la plus
+    récente restante, par l'index normes(secteur_id, date_creation).
+    """
+    deltas = defaultdict(int)
+    derniere = dict(stats)
+    recompute = set()
+    for secteur_id, date_creation in added:
+        deltas[secteur_id] += 1
+        if derniere.get(secteur_id) is None or date_creation > derniere[secteur_id]:
+            derniere[secteur_id] = date_creation
+    for secteur_id, date_creation in removed:
+        deltas[secteur_id] -= 1
+        if stats.get(secteur_id) is None or date_creation >= stats[secteur_id]:
+            recompute.add(secteur_id)
+
+    dialect = db.bind.dialect.name
+    for secteur_id in sorted(deltas):
+        if secteur_id in recompute:
+            derniere[secteur_id] = await db.scalar(
+                select(Norme.date_creation)
+                .where(Norme.secteur_id == secteur_id)
+                .order_by(Norme.date_creation.desc())
+                .limit(1)
+                .with_for_update(read=True)
+            )
+        if deltas[secteur_id] or derniere[secteur_id] != stats.get(secteur_id):
+            await db.execute(_upsert(dialect, secteur_id, deltas[secteur_id], derniere[secteur_id]))
@@ -0,0 +1,58 @@
+# app/utils/singleflight.py
+import asyncio
+from collections import defaultdict
+
+
+class SingleFlight:
+    """Regroupe les lectures identiques simultanées d'un même worker.
+
+    Le premier appel pour une clé lance le chargement ; les appels suivants,
+    tant qu'il est en cours, attendent son résultat au lieu de refaire la
+    requête. La clé commence par la route, suivie des paramètres. Le
+    chargement tourne dans sa propre tâche (et doit ouvrir sa propre
+    session) : l'annulation d'une requête n'interrompt pas les autres.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._leaders = defaultdict(int)
+        self._collapsed = defaultdict(int)
+
+    async def do(self, key: tuple, loader):
+        task = self._inflight.get(key)
+        if task is None:
+            self._leaders[key[0]] += 1
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self._collapsed[key[0]] += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Évite "exception was never retrieved" si tous les appelants sont partis
+        if not task.cancelled():
+            task.exception()
+
+    def forget(self, key: tuple):
+        """Après une écriture : les appels suivants ne rejoignent plus le
+        chargement en cours, qui a pu lire l'état précédent."""
+        self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        routes = set(self._leaders) | set(self._collapsed)
+        return {
+            "in_flight": len(self._inflight),
+            "routes": {
+                route: {
+                    "executed": self._leaders[route],
+                    "collapsed": self._collapsed[route],
+                }
+                for route in sorted(routes)
+            },
+        }
+
+
+flights = SingleFlight()
@@ -0,0 +1,175 @@
+# app/utils/storage.py
+import asyncio
+import hashlib
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from urllib.parse import quote
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from app.config.settings import settings
+from app.models.norme import Norme
+
+logger = logging.getLogger(__name__)
+
+# Stockage adressé par contenu : uploads/pdf/ab/cd/abcd….pdf (SHA-256).
+# Deux normes avec le même PDF partagent le même fichier ; les lignes de
+# `normes` qui portent ce hash sont ses références.
+UPLOAD_DIR = Path("uploads/pdf")
+TMP_DIR = UPLOAD_DIR / "tmp"
+TMP_DIR.mkdir(parents=True, exist_ok=True)
+
+# Lecture / écriture par blocs de taille fixe : mémoire constante quel que soit le PDF
+CHUNK_SIZE = 1024 * 1024
+MAX_PDF_SIZE = settings.MAX_PDF_SIZE_MB * 1024 * 1024
+
+
+class FichierTropVolumineux(Exception):
+    pass
+
+
+def blob_path(sha256: str) -> Path:
+    return UPLOAD_DIR / sha256[:2] / sha256[2:4] / f"{sha256}.pdf"
+
+
+def accel_redirect_uri(path: str):
+    """URI interne nginx d'un PDF (X-Accel-Redirect), ou None s'il est hors
+    de UPLOAD_DIR."""
+    try:
+        relative = Path(path).resolve().relative_to(UPLOAD_DIR.resolve())
+    except ValueError:
+        return None
+    return settings.PDF_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + quote(relative.as_posix())
+
+
+def receive_upload(upload: UploadFile, max_size: int = MAX_PDF_SIZE):
+    """Copie un upload dans un fichier temporaire par blocs, en calculant son
+    SHA-256 au passage.
+
+    Bloquant : à appeler via run_in_threadpool, jamais directement dans la
+    boucle d'événements. Retourne (chemin temporaire,
+    taille, sha256) ; le fichier est ensuite rangé par store_blob().
+    """
+    if upload.size is not None and upload.size > max_size:
+        raise FichierTropVolumineux(upload.filename)
+    return receive_file(upload.file, upload.filename, max_size)
+
+
+def receive_file(source, name: str, max_size: int = MAX_PDF_SIZE):
+    """Comme receive_upload, pour un fichier binaire déjà ouvert (membre
+    d'une archive ZIP, fichier local)."""
+    digest = hashlib.sha256()
+    size = 0
+    tmp_path = TMP_DIR / f"{uuid.uuid4().hex}.part"
+    try:
+        with tmp_path.open("wb") as buffer:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise FichierTropVolumineux(name)
+                digest.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return tmp_path, size, digest.hexdigest()
+
+
+# Rangement et libération d'un même fichier sérialisés dans le worker ;
+# entre workers, le SELECT ... FOR UPDATE de release_blob fait attendre
+# l'insertion d'une référence au même hash
+_blob_locks = {}
+
+
+@asynccontextmanager
+async def blob_lock(key: str):
+    """Verrou par fichier (hash, ou chemin pour les lignes sans hash),
+    retiré du registre quand plus personne ne l'attend."""
+    entry = _blob_locks.get(key)
+    if entry is None:
+        entry = _blob_locks[key] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _blob_locks[key]
+
+
+def place_blob(tmp_path: Path, sha256: str) -> Path:
+    """Range le fichier temporaire à son adresse, ou l'écarte si ce contenu
+    est déjà stocké. Bloquant : appelé par store_blob.
+    """
+    destination = blob_path(sha256)
+    if destination.exists():
+        tmp_path.unlink(missing_ok=True)
+    else:
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.replace(destination)
+    return destination
+
+
+async def store_blob(tmp_path: Path, sha256: str) -> Path:
+    """place_blob sous le verrou du hash. À appeler après le commit de la
+    ligne qui référence le fichier."""
+    async with blob_lock(sha256):
+        return await run_in_threadpool(place_blob, tmp_path, sha256)
+
+
+async def release_blob(db, sha256: str, path: str):
+    """Supprime le fichier quand plus aucune norme ne le référence.
+
+    À appeler après le commit qui a retiré la référence. Les lignes
+    antérieures au stockage par hash (sha256 NULL) sont comptées par chemin.
+
+    Les références sont comptées sous le verrou du fichier, juste avant la
+    suppression : une norme au même contenu commitée entre-temps range son
+    fichier après (store_blob attend le verrou) ou est vue ici. Le FOR UPDATE
+    (verrou de l'entrée d'index, ou de l'intervalle vide sous InnoDB) bloque
+    jusqu'au commit final l'insertion d'une référence depuis un autre worker.
+    """
+    if sha256:
+        condition = Norme.fichier_sha256 == sha256
+    else:
+        condition = Norme.fichier_pdf == path
+    async with blob_lock(sha256 or path):
+        still_used = await db.scalar(select(Norme.id).where(condition).limit(1).with_for_update())
+        if still_used is None:
+            await run_in_threadpool(Path(path).unlink, missing_ok=True)
+        # Fin de transaction : libère le verrou du FOR UPDATE
+        await db.commit()
+
+
+async def release_blobs(db, fichiers):
+    """release_blob pour plusieurs fichiers (sha256, chemin).
+
+    Les fichiers encore référencés sont écartés d'abord, en une requête par
+    mode d'adressage ; chacun des autres passe par release_blob, qui recompte
+    ses références sous verrou juste avant de le supprimer. Prévu pour une
+    tâche de fond : un échec est journalisé, le fichier reste en place et
+    les suivants sont traités.
+    """
+    fichiers = set(fichiers)
+    hashes = {sha256 for sha256, _ in fichiers if sha256}
+    paths = {path for sha256, path in fichiers if not sha256}
+    used_hashes = set((await db.scalars(
+        select(Norme.fichier_sha256).where(Norme.fichier_sha256.in_(hashes)).distinct()
+    )).all()) if hashes else set()
+    used_paths = set((await db.scalars(
+        select(Norme.fichier_pdf).where(Norme.fichier_pdf.in_(paths)).distinct()
+    )).all()) if paths else set()
+    for sha256, path in fichiers:
+        still_used = sha256 in used_hashes if sha256 else path in used_paths
+        if not still_used:
+            try:
+                await release_blob(db, sha256, path)
+            except Exception:
+                logger.exception("Libération du fichier %s impossible", path)
+                await db.rollback()
@@ -0,0 +1,101 @@
+# app/utils/zip_stream.py
+import re
+import zipfile
+from datetime import datetime
+from fastapi.concurrency import iterate_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.utils.storage import CHUNK_SIZE
+
+# Caractères interdits dans un nom d'entrée (séparateurs de chemin, contrôle)
+UNSAFE_NAME_RE = re.compile(r'[\x00-\x1f/\\:*?"<>|]')
+
+
+class _Sink:
+    """Fichier en écriture seule, non positionnable : zipfile y écrit les
+    octets de l'archive, le générateur les vide au fur et à mesure."""
+
+    def __init__(self):
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def __len__(self):
+        return self._size
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self._size = 0
+        return data
+
+
+def entry_name(codification: str, seen: set) -> str:
+    name = UNSAFE_NAME_RE.sub("_", codification).strip(". ") or "norme"
+    candidate, i = f"{name}.pdf", 1
+    while candidate in seen:
+        i += 1
+        candidate = f"{name}-{i}.pdf"
+    seen.add(candidate)
+    return candidate
+
+
+def iter_zip(entries):
+    """Archive ZIP produite à la volée, sans fichier temporaire : au plus un
+    bloc de lecture en mémoire.
+
+    `entries` : tuples (nom dans l'archive, chemin, date de modification ou
+    None). Les PDF sont déjà compressés : entrées "stored", sans
+    recompression ; la sortie n'étant pas positionnable, CRC et tailles
+    suivent chaque fichier (descripteur de données). Les fichiers absents du
+    disque sont listés dans MANQUANTS.txt en fin d'archive.
+
+    Bloquant (lecture des fichiers) : à itérer via iterate_in_threadpool.
+    """
+    sink = _Sink()
+    missing = []
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for name, path, modifie_le in entries:
+            try:
+                source = open(path, "rb")
+            except OSError:
+                missing.append(name)
+                continue
+            with source:
+                info = zipfile.ZipInfo(name, date_time=(modifie_le or datetime(1980, 1, 1)).timetuple()[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                with zf.open(info, "w") as target:
+                    while True:
+                        chunk = source.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        target.write(chunk)
+                        if len(sink) >= CHUNK_SIZE:
+                            yield sink.drain()
+            if len(sink):
+                yield sink.drain()
+        if missing:
+            zf.writestr("MANQUANTS.txt", "Fichiers introuvables sur le serveur :\n" + "\n".join(missing) + "\n")
+    # Répertoire central, écrit à la fermeture
+    yield sink.drain()
+
+
+def normes_zip_response(rows, filename: str) -> StreamingResponse:
+    """Réponse ZIP des PDF de `rows` (codification, fichier_pdf,
+    fichier_modifie_le), une entrée <codification>.pdf par norme."""
+    seen = set()
+    entries = [
+        (entry_name(row.codification, seen), row.fichier_pdf, row.fichier_modifie_le)
+        for row in rows
+    ]
+    return StreamingResponse(
+        iterate_in_threadpool(iter_zip(entries)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,99 @@
+# benchmarks/serialization.py
+"""Coût de sérialisation des pages des endpoints de liste.
+
+Compare l'ancien chemin (dicts + date_creation.isoformat() + JSONResponse,
+json de la bibliothèque standard) au chemin actuel (dicts typés sérialisés en
+bytes par un TypeAdapter mis en cache). Aucune base n'est nécessaire : les
+lignes sont synthétiques, seule la fabrication du corps est mesurée.
+
+    python -m benchmarks.serialization [--rows 500] [--repeat 200]
+"""
+import argparse
+import json
+import timeit
+from collections import namedtuple
+from datetime import date
+from fastapi.responses import JSONResponse
+from app.schemas.admin import AdminData
+from app.schemas.norme import NormeData
+from app.schemas.secteur import SecteurData
+from app.utils.response import paginated_response
+
+NormeRow = namedtuple("NormeRow", "id codification nom date_creation fichier_pdf secteur_id secteur_nom")
+EntityRow = namedtuple("EntityRow", "id nom username email")
+
+
+def make_rows(count: int):
+    normes = [
+        NormeRow(i, f"NM-{i:05d}", f"Norme n°{i} — béton armé", date(2024, 1, 1 + i % 28),
+                 f"uploads/pdf/ab/cd/{i:064x}.pdf", i % 12 + 1, f"Secteur {i % 12 + 1}")
+        for i in range(count)
+    ]
+    entities = [EntityRow(i, f"Secteur {i}", f"user{i}", f"user{i}@example.mg") for i in range(count)]
+    return normes, entities
+
+
+def legacy_page(data):
+    return JSONResponse(content={"success": True, "message": "Success", "data": data, "next_cursor": None}).body
+
+
+def legacy_norme(row):
+    return {
+        "id": row.id,
+        "codification": row.codification,
+        "nom": row.nom,
+        "date_creation": row.date_creation.isoformat() if row.date_creation else None,
+        "fichier_pdf": row.fichier_pdf,
+        "secteur": {"id": row.secteur_id, "nom": row.secteur_nom} if row.secteur_id is not None else None
+    }
+
+
+def typed_norme(row):
+    return {
+        "id": row.id,
+        "codification": row.codification,
+        "nom": row.nom,
+        "date_creation": row.date_creation,
+        "fichier_pdf": row.fichier_pdf,
+        "secteur": {"id": row.secteur_id, "nom": row.secteur_nom} if row.secteur_id is not None else None
+    }
+
+
+def cases(normes, entities):
+    return {
+        "GET /normes/": (
+            lambda: legacy_page([legacy_norme(r) for r in normes]),
+            lambda: paginated_response(data=[typed_norme(r) for r in normes], schema=NormeData).body,
+        ),
+        "GET /secteurs/": (
+            lambda: legacy_page([{"id": r.id, "nom": r.nom} for r in entities]),
+            lambda: paginated_response(data=[{"id": r.id, "nom": r.nom} for r in entities], schema=SecteurData).body,
+        ),
+        "GET /admins/": (
+            lambda: legacy_page([{"id": r.id, "username": r.username, "email": r.email} for r in entities]),
+            lambda: paginated_response(
+                data=[{"id": r.id, "username": r.username, "email": r.email} for r in entities], schema=AdminData
+            ).body,
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500, help="lignes par page")
+    parser.add_argument("--repeat", type=int, default=200, help="pages sérialisées par mesure")
+    args = parser.parse_args()
+
+    normes, entities = make_rows(args.rows)
+    print(f"{args.rows} lignes par page, meilleur de 5 x {args.repeat}")
+    print(f"{'endpoint':<16}{'avant (ms)':>12}{'après (ms)':>12}{'gain':>8}")
+    for name, (before, after) in cases(normes, entities).items():
+        # Même document JSON des deux côtés (au formatage près)
+        assert json.loads(before()) == json.loads(after()), name
+        t_before = min(timeit.repeat(before, number=args.repeat, repeat=5)) / args.repeat * 1000
+        t_after = min(timeit.repeat(after, number=args.repeat, repeat=5)) / args.repeat * 1000
+        print(f"{name:<16}{t_before:>12.3f}{t_after:>12.3f}{t_before / t_after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# tests/conftest.py
+import os
+import tempfile
+
+# Avant tout import de app.* : la configuration est lue à l'import.
+# Base SQLite jetable, caches en mémoire désactivés et versions relues à
+# chaque requête pour que chaque requête HTTP passe par la base.
+_TMP_DIR = tempfile.mkdtemp(prefix="normes-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+os.environ["DB_ASYNC"] = "false"
+os.environ["CACHE_MAX_ENTRIES"] = "0"
+os.environ["CACHE_VERSION_CHECK_SECONDS"] = "0"
+for key, value in {
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_HOST": "localhost",
+    "DB_PORT": "3306",
+    "DB_NAME": "test",
+    "SECRET_KEY": "test-secret-key-" + "x" * 32,
+}.items():
+    os.environ.setdefault(key, value)
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+from app.api import norme_api
+from app.config import database
+from app.config.database import SessionLocal, ThreadedSession, get_db
+from app.models import Base
+from app.models.secteur import Secteur
+from app.utils.search import normes_index, contenus_index
+
+
+@pytest.fixture
+def client():
+    """Application réduite au router des normes, sur une base neuve avec
+    deux secteurs (1 : Bâtiment, 2 : Électricité)."""
+    Base.metadata.create_all(database.engine)
+    with database.engine.begin() as conn:
+        conn.execute(insert(Secteur), [{"id": 1, "nom": "Bâtiment"}, {"id": 2, "nom": "Électricité"}])
+    # Index de repli d'un test précédent (versions remises à zéro avec la base)
+    normes_index.clear()
+    contenus_index.clear()
+
+    async def override_get_db():
+        db = ThreadedSession(SessionLocal(expire_on_commit=False))
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    app = FastAPI()
+    app.include_router(norme_api.router)
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+    Base.metadata.drop_all(database.engine)
+
+
+@pytest.fixture
+def count_statements():
+    """count_statements(fn) : nombre de requêtes SQL exécutées par fn()."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def measure(fn):
+        statements.clear()
+        fn()
+        return len(statements)
+
+    event.listen(database.engine, "before_cursor_execute", before_cursor_execute)
+    yield measure
+    event.remove(database.engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,123 @@
+# tests/test_normes_queries.py
+"""Liste, détail, création et modification des normes : même nombre de
+requêtes SQL avec 2 ou N normes (normes_select / norme_to_dict en une
+requête jointe, pas de N+1, pas de relecture après écriture)."""
+from datetime import date
+import pytest
+from sqlalchemy import delete, func, insert, select
+from app.api import norme_api
+from app.config import database
+from app.models.cache_version import CacheVersion
+from app.models.norme import Norme
+from app.models.secteur import Secteur
+from app.models.secteur_stats import SecteurStats
+from app.utils import storage
+
+N = 120
+
+
+def add_normes(start: int, count: int, secteur_id: int = None):
+    """Normes start+1 .. start+count (secteurs 1 et 2 en alternance par
+    défaut), avec secteurs_stats et cache_versions tels que l'application
+    les laisse après ses propres écritures."""
+    with database.engine.begin() as conn:
+        conn.execute(insert(Norme), [
+            {
+                "id": i,
+                "codification": f"NM-{i:05d}",
+                "nom": f"Norme {i}",
+                "date_creation": date(2024, 1, 1 + i % 28),
+                "secteur_id": secteur_id or 1 + i % 2,
+                "fichier_pdf": f"uploads/pdf/{i:064x}.pdf",
+            }
+            for i in range(start + 1, start + count + 1)
+        ])
+        conn.execute(delete(SecteurStats))
+        conn.execute(insert(SecteurStats).from_select(
+            ["secteur_id", "nb_normes", "derniere_date_creation"],
+            select(Secteur.id, func.count(Norme.id), func.max(Norme.date_creation))
+            .outerjoin(Norme, Norme.secteur_id == Secteur.id)
+            .group_by(Secteur.id)
+        ))
+        if conn.scalar(select(CacheVersion.version).where(CacheVersion.nom == "normes")) is None:
+            conn.execute(insert(CacheVersion).values(nom="normes", version=1))
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    # PDF rangés dans un répertoire jetable ; pas d'extraction de texte
+    monkeypatch.setattr(storage, "UPLOAD_DIR", tmp_path / "pdf")
+    monkeypatch.setattr(storage, "TMP_DIR", tmp_path / "pdf" / "tmp")
+    (tmp_path / "pdf" / "tmp").mkdir(parents=True)
+    monkeypatch.setattr(norme_api, "index_norme_pdf", lambda norme_id, path: None)
+
+
+def get_ok(client, url: str) -> dict:
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_list_statements_do_not_grow_with_rows(client, count_statements):
+    add_normes(0, 2)
+    body = {}
+    with_2 = count_statements(lambda: body.update(get_ok(client, f"/normes/?limit={N}")))
+    assert len(body["data"]) == 2
+
+    add_normes(2, N - 2)
+    with_n = count_statements(lambda: body.update(get_ok(client, f"/normes/?limit={N}")))
+    assert len(body["data"]) == N
+    assert body["data"][0]["secteur"] == {"id": 2, "nom": "Électricité"}
+
+    assert with_n == with_2
+
+
+def test_detail_statements_do_not_grow_with_rows(client, count_statements):
+    add_normes(0, 2)
+    body = {}
+    with_2 = count_statements(lambda: body.update(get_ok(client, "/normes/2")))
+    assert body["data"]["secteur"] == {"id": 1, "nom": "Bâtiment"}
+
+    add_normes(2, N - 2)
+    with_n = count_statements(lambda: body.update(get_ok(client, f"/normes/{N}")))
+    assert body["data"]["codification"] == f"NM-{N:05d}"
+
+    assert with_n == with_2
+
+
+def test_create_statements_do_not_grow_with_rows(client, count_statements, uploads):
+    def create(codification: str):
+        response = client.post(
+            "/normes/",
+            data={"codification": codification, "nom": "Nouvelle norme", "date_creation": "2024-06-01", "secteur_id": "1"},
+            files={"fichier_pdf": ("norme.pdf", f"%PDF-1.4 {codification}".encode(), "application/pdf")},
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["data"]["secteur"] == {"id": 1, "nom": "Bâtiment"}
+
+    add_normes(0, 2)
+    with_2 = count_statements(lambda: create("NEW-1"))
+
+    add_normes(3, N - 3)
+    with_n = count_statements(lambda: create("NEW-2"))
+
+    assert with_n == with_2
+
+
+def test_update_statements_do_not_grow_with_rows(client, count_statements, uploads):
+    def update(norme_id: int, date_creation: str):
+        # Date postérieure à toutes les autres, sur une norme qui ne portait
+        # pas la plus récente de son secteur : même chemin de mise à jour des
+        # statistiques à chaque mesure
+        response = client.put(f"/normes/{norme_id}", data={"nom": "Renommée", "date_creation": date_creation})
+        assert response.status_code == 200, response.text
+        data = response.json()["data"]
+        assert data["nom"] == "Renommée" and data["date_creation"] == date_creation
+
+    add_normes(0, 2, secteur_id=1)
+    with_2 = count_statements(lambda: update(1, "2030-01-01"))
+
+    add_normes(2, N - 2, secteur_id=1)
+    with_n = count_statements(lambda: update(3, "2031-01-01"))
+
+    assert with_n == with_2
@@ -0,0 +1,103 @@
+# tests/test_normes_search.py
+"""GET /normes/search sur SQLite : index inversé de repli (classement,
+préfixes de codification, pagination par curseur, cohérence entre workers)."""
+from datetime import date
+from sqlalchemy import delete, insert
+from app.config.database import SessionLocal
+from app.models.norme import Norme
+from app.utils.cache import bump_version_sync
+
+NORMES = [
+    (1, "NF-EN-206", "Béton armé, exécution des ouvrages en béton"),
+    (2, "NF-EN-13670", "Béton prêt à l'emploi"),
+    (3, "NF-C-15100", "Câbles électriques"),
+    (4, "ISO-1920", "Bétonnière de chantier"),
+    (5, "NF-C-14100", "Installations électriques basse tension"),
+]
+
+
+def norme_row(norme_id: int, codification: str, nom: str) -> dict:
+    return {
+        "id": norme_id,
+        "codification": codification,
+        "nom": nom,
+        "date_creation": date(2024, 1, norme_id),
+        "secteur_id": 1,
+        "fichier_pdf": f"uploads/pdf/{norme_id:064x}.pdf",
+    }
+
+
+def write_as_other_worker(statement):
+    """Écriture d'un autre worker : même base, version "normes" incrémentée,
+    aucun appel aux index en mémoire de ce processus."""
+    with SessionLocal() as db:
+        db.execute(statement)
+        bump_version_sync(db, "normes")
+        db.commit()
+
+
+def search(client, q: str, **params) -> dict:
+    response = client.get("/normes/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def ids(body: dict) -> list:
+    return [norme["id"] for norme in body["data"]]
+
+
+def seed():
+    write_as_other_worker(insert(Norme).values([norme_row(*norme) for norme in NORMES]))
+
+
+def test_exact_words_rank_before_prefixes(client):
+    seed()
+    body = search(client, "beton")
+    # « beton » (accents ignorés) dans 1 et 2, seulement en préfixe de « betonniere » dans 4
+    assert set(ids(body)[:2]) == {1, 2}
+    assert ids(body)[2:] == [4]
+    # Deux occurrences de « beton » dans 1 : devant 2
+    assert ids(body)[0] == 1
+    scores = [norme["score"] for norme in body["data"]]
+    assert scores == sorted(scores, reverse=True)
+    assert body["data"][0]["secteur"] == {"id": 1, "nom": "Bâtiment"}
+
+
+def test_codification_prefix_matches(client):
+    seed()
+    assert ids(search(client, "1510")) == [3]
+    # Tous les termes de « NF-EN » (nf, en) : 1 et 2 devant les autres NF
+    body = search(client, "NF-EN")
+    assert set(ids(body)[:2]) == {1, 2}
+    assert set(ids(body)[2:]) == {3, 5}
+    assert ids(search(client, "iso 1920")) == [4]
+
+
+def test_pagination_follows_ranking(client):
+    seed()
+    expected = ids(search(client, "nf electriques"))
+    assert len(expected) == 4
+
+    pages, after = [], None
+    while True:
+        params = {"limit": 1} if after is None else {"limit": 1, "after": after}
+        body = search(client, "nf electriques", **params)
+        pages.extend(ids(body))
+        after = body["next_cursor"]
+        if after is None:
+            break
+    assert pages == expected
+
+    response = client.get("/normes/search", params={"q": "nf", "after": "pas-un-curseur"})
+    assert response.status_code == 400
+
+
+def test_index_follows_writes_from_other_workers(client):
+    seed()
+    assert ids(search(client, "grue")) == []
+
+    write_as_other_worker(insert(Norme).values(norme_row(6, "NF-E-52", "Grues à tour")))
+    assert ids(search(client, "grue")) == [6]
+
+    write_as_other_worker(delete(Norme).where(Norme.id == 6))
+    assert ids(search(client, "grue")) == []